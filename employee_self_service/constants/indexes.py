@@ -0,0 +1,22 @@
+# composite indexes installed on standard doctypes for the mobile api queries
+INDEXES = {
+    "Employee Checkin": [["employee", "time"], ["attendance"]],
+    "Expense Claim": [["employee", "modified"], ["employee", "posting_date"]],
+    "Salary Slip": [["employee", "modified"]],
+    "Leave Application": [["employee", "modified"]],
+    "Leave Allocation": [["employee", "leave_type", "from_date"]],
+    "Leave Ledger Entry": [["employee", "leave_type", "from_date"]],
+    "Deleted Document": [["deleted_doctype", "creation"]],
+    "Holiday": [["holiday_date", "parent"]],
+    "Employee": [["holiday_list", "status"], ["company", "status"]],
+    "Item Price": [["price_list", "item_code"]],
+    "Push Notification": [["send_for", "user", "creation"], ["send_for", "creation"]],
+    "Notification User": [["user", "parent"]],
+    "ToDo": [["allocated_to", "reference_type", "status"]],
+    "Comment": [["reference_doctype", "reference_name", "comment_type", "creation"]],
+}
+
+# unique constraints the mobile api relies on for upserts
+UNIQUE_INDEXES = {
+    "ESS Post Poll Log": [["parent", "user"]],
+}
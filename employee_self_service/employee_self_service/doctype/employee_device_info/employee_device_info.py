@@ -1,8 +1,85 @@
 # Copyright (c) 2023, Nesscale Solutions Private Limited and contributors
 # For license information, please see license.txt
 
-# import frappe
+import hashlib
+import frappe
 from frappe.model.document import Document
+from frappe.utils import now
+
+# FCM errors meaning the token will never be valid again
+STALE_TOKEN_ERRORS = ("NotRegistered", "InvalidRegistration")
+
 
 class EmployeeDeviceInfo(Document):
-	pass
+	def autoname(self):
+		self.name = get_device_name(self.token)
+
+
+def get_device_name(token):
+	# one row per device, keyed by the token so re-registering never duplicates
+	return hashlib.sha1((token or "").encode()).hexdigest()
+
+
+def register_device(
+	user, token, platform=None, os_version=None, device_name=None, app_version=None
+):
+	"""Insert or update the device of `token` for `user` in a single statement."""
+	if not token:
+		frappe.throw("Device token is required")
+	timestamp = now()
+	values = dict(
+		name=get_device_name(token),
+		timestamp=timestamp,
+		user=user,
+		token=token,
+		platform=platform,
+		os_version=os_version,
+		device_name=device_name,
+		app_version=app_version,
+	)
+	frappe.db.multisql(
+		{
+			"mariadb": """INSERT INTO `tabEmployee Device Info`
+			(`name`, `creation`, `modified`, `modified_by`, `owner`, `docstatus`, `idx`,
+			`user`, `token`, `platform`, `os_version`, `device_name`, `app_version`)
+			VALUES (%(name)s, %(timestamp)s, %(timestamp)s, %(user)s, %(user)s, 0, 0,
+			%(user)s, %(token)s, %(platform)s, %(os_version)s, %(device_name)s, %(app_version)s)
+			ON DUPLICATE KEY UPDATE
+			`modified`=VALUES(`modified`), `modified_by`=VALUES(`modified_by`),
+			`user`=VALUES(`user`), `platform`=VALUES(`platform`),
+			`os_version`=VALUES(`os_version`), `device_name`=VALUES(`device_name`),
+			`app_version`=VALUES(`app_version`)
+			""",
+			"postgres": """INSERT INTO "tabEmployee Device Info"
+			("name", "creation", "modified", "modified_by", "owner", "docstatus", "idx",
+			"user", "token", "platform", "os_version", "device_name", "app_version")
+			VALUES (%(name)s, %(timestamp)s, %(timestamp)s, %(user)s, %(user)s, 0, 0,
+			%(user)s, %(token)s, %(platform)s, %(os_version)s, %(device_name)s, %(app_version)s)
+			ON CONFLICT ("name") DO UPDATE SET
+			"modified"=EXCLUDED."modified", "modified_by"=EXCLUDED."modified_by",
+			"user"=EXCLUDED."user", "platform"=EXCLUDED."platform",
+			"os_version"=EXCLUDED."os_version", "device_name"=EXCLUDED."device_name",
+			"app_version"=EXCLUDED."app_version"
+			""",
+		},
+		values,
+	)
+	return values["name"]
+
+
+def get_stale_tokens(registration_ids, results):
+	"""Tokens FCM reported as unregistered, `results` is aligned with `registration_ids`."""
+	stale_tokens = []
+	for token, result in zip(registration_ids, results or []):
+		if (result or {}).get("error") in STALE_TOKEN_ERRORS:
+			stale_tokens.append(token)
+	return stale_tokens
+
+
+def prune_device_tokens(tokens):
+	if not tokens:
+		return
+	frappe.db.delete(
+		"Employee Device Info",
+		{"name": ("in", [get_device_name(token) for token in tokens])},
+	)
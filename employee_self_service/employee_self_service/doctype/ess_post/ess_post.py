@@ -2,7 +2,7 @@
 # For license information, please see license.txt
 
 import frappe
-from frappe.utils import today, add_days, cint
+from frappe.utils import today, add_days, cint, now
 from frappe.model.document import Document
 
 
@@ -12,21 +12,84 @@ class ESSPost(Document):
             self.poll_start_date = today()
             self.poll_end_date = add_days(today(), cint(self.poll_duration))
         if not self.get("__islocal"):
-            answer_map_dict = self.get_answe_map()
+            # counters are updated in place by likes and comments, never from the form
+            self.like_count, self.comment_count = frappe.db.get_value(
+                "ESS Post", self.name, ["like_count", "comment_count"]
+            )
+            # vote tallies are updated in place by record_poll_vote, saves are
+            # rare and may replace the option rows, so recount from the log
+            num_of_votes = dict(
+                frappe.db.sql(
+                    """SELECT answer, COUNT(name)
+                    FROM `tabESS Post Poll Log`
+                    WHERE parent = %s AND parenttype = 'ESS Post'
+                    GROUP BY answer""",
+                    self.name,
+                )
+            )
+            total_votes = sum(
+                num_of_votes.get(op.option, 0) for op in self.ess_post_poll_options
+            )
             for op in self.ess_post_poll_options:
-                option_answers = answer_map_dict.get(op.get("option"))
-                if option_answers:
-                    op.num_of_vote = len(option_answers)
-                    op.percentage = 100 * op.num_of_vote / len(self.ess_post_poll_log)
-                else:
-                    op.num_of_vote = 0
-                    op.percentage = 0
-
-    def get_answe_map(self):
-        answers = {}
-        for poll_ans in self.ess_post_poll_log:
-            if not answers.get(poll_ans.get("answer")):
-                answers[poll_ans.get("answer")] = [poll_ans]
-            else:
-                answers[poll_ans.get("answer")].append(poll_ans)
-        return answers
+                op.num_of_vote = num_of_votes.get(op.option, 0)
+                op.percentage = 100 * op.num_of_vote / total_votes if total_votes else 0
+
+    def on_trash(self):
+        frappe.db.delete("ESS Post Like", {"post": self.name})
+
+
+def record_poll_vote(post, user, answer):
+    """
+    Record the vote of `user` on the poll `post` with one upsert on the
+    (parent, user) unique key and move the option tallies atomically.
+    """
+    previous_answer = frappe.db.sql(
+        """SELECT answer FROM `tabESS Post Poll Log`
+        WHERE parent = %(post)s AND parenttype = 'ESS Post' AND user = %(user)s
+        FOR UPDATE""",
+        dict(post=post, user=user),
+    )
+    previous_answer = previous_answer[0][0] if previous_answer else None
+    if previous_answer == answer:
+        return
+
+    timestamp = now()
+    frappe.db.multisql(
+        {
+            "mariadb": """INSERT INTO `tabESS Post Poll Log`
+            (`name`, `creation`, `modified`, `modified_by`, `owner`, `docstatus`, `idx`,
+            `parent`, `parenttype`, `parentfield`, `user`, `answer`)
+            VALUES (%(name)s, %(timestamp)s, %(timestamp)s, %(user)s, %(user)s, 0, 0,
+            %(post)s, 'ESS Post', 'ess_post_poll_log', %(user)s, %(answer)s)
+            ON DUPLICATE KEY UPDATE
+            `answer`=VALUES(`answer`), `modified`=VALUES(`modified`)
+            """,
+            "postgres": """INSERT INTO "tabESS Post Poll Log"
+            ("name", "creation", "modified", "modified_by", "owner", "docstatus", "idx",
+            "parent", "parenttype", "parentfield", "user", "answer")
+            VALUES (%(name)s, %(timestamp)s, %(timestamp)s, %(user)s, %(user)s, 0, 0,
+            %(post)s, 'ESS Post', 'ess_post_poll_log', %(user)s, %(answer)s)
+            ON CONFLICT ("parent", "user") DO UPDATE SET
+            "answer"=EXCLUDED."answer", "modified"=EXCLUDED."modified"
+            """,
+        },
+        dict(
+            name=frappe.generate_hash(length=10),
+            timestamp=timestamp,
+            post=post,
+            user=user,
+            answer=answer,
+        ),
+    )
+    update_poll_tally(post, answer, 1)
+    if previous_answer is not None:
+        update_poll_tally(post, previous_answer, -1)
+
+
+def update_poll_tally(post, option, delta):
+    frappe.db.sql(
+        """UPDATE `tabESS Post Poll Options`
+        SET num_of_vote = GREATEST(COALESCE(num_of_vote, 0) + %(delta)s, 0)
+        WHERE parent = %(post)s AND parenttype = 'ESS Post' AND `option` = %(option)s""",
+        dict(post=post, option=option, delta=delta),
+    )
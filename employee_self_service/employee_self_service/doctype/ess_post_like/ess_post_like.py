@@ -0,0 +1,66 @@
+# Copyright (c) 2026, Nesscale Solutions Private Limited and contributors
+# For license information, please see license.txt
+
+import hashlib
+import json
+import frappe
+from frappe import _
+from frappe.model.document import Document
+
+
+class ESSPostLike(Document):
+	def autoname(self):
+		self.name = get_like_name(self.post, self.user)
+
+
+def get_like_name(post, user):
+	# one like per (post, user), the primary key keeps it unique
+	return hashlib.sha1(f"{post}|{user}".encode()).hexdigest()
+
+
+def toggle_post_like(post, user, like):
+	"""
+	Add or remove the like of `user` on `post` and keep ESS Post.like_count
+	and _liked_by in step, under a lock on the post row.
+	"""
+	liked_by = frappe.db.get_value("ESS Post", post, "_liked_by", for_update=True)
+	if liked_by is None and not frappe.db.exists("ESS Post", post):
+		raise frappe.DoesNotExistError(_("ESS Post {0} not found").format(post))
+
+	name = get_like_name(post, user)
+	# repeated toggles are no-ops, the lock serializes the likes of the post
+	if bool(frappe.db.exists("ESS Post Like", name)) == bool(like):
+		return
+	if like:
+		frappe.get_doc(dict(doctype="ESS Post Like", post=post, user=user)).insert(
+			ignore_permissions=True
+		)
+	else:
+		frappe.db.delete("ESS Post Like", {"name": name})
+	update_post_counter(post, "like_count", 1 if like else -1)
+
+	liked_by = json.loads(liked_by or "[]")
+	if like:
+		liked_by.append(user)
+	else:
+		liked_by = [liker for liker in liked_by if liker != user]
+	frappe.db.set_value(
+		"ESS Post", post, "_liked_by", json.dumps(liked_by), update_modified=False
+	)
+
+
+def update_post_counter(post, fieldname, delta):
+	frappe.db.sql(
+		f"""UPDATE `tabESS Post`
+		SET `{fieldname}` = GREATEST(COALESCE(`{fieldname}`, 0) + %(delta)s, 0)
+		WHERE name = %(post)s""",
+		dict(post=post, delta=delta),
+	)
+
+
+def update_comment_count(doc, method=None):
+	if doc.reference_doctype != "ESS Post" or doc.comment_type != "Comment":
+		return
+	update_post_counter(
+		doc.reference_name, "comment_count", -1 if method == "on_trash" else 1
+	)
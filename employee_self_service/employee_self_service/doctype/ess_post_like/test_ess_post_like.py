@@ -0,0 +1,34 @@
+# Copyright (c) 2026, Nesscale Solutions Private Limited and Contributors
+# See license.txt
+
+import json
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from employee_self_service.employee_self_service.doctype.ess_post_like.ess_post_like import (
+	toggle_post_like,
+)
+
+
+class TestESSPostLike(FrappeTestCase):
+	def setUp(self):
+		self.post = frappe.get_doc(
+			dict(doctype="ESS Post", post_type="Post", post_content="Test Post")
+		).insert(ignore_permissions=True)
+
+	def get_likes(self):
+		like_count, liked_by = frappe.db.get_value(
+			"ESS Post", self.post.name, ["like_count", "_liked_by"]
+		)
+		return like_count, json.loads(liked_by or "[]")
+
+	def test_like_and_unlike(self):
+		user = "Administrator"
+		toggle_post_like(self.post.name, user, True)
+		toggle_post_like(self.post.name, user, True)
+		self.assertEqual(self.get_likes(), (1, [user]))
+		self.assertEqual(frappe.db.count("ESS Post Like", {"post": self.post.name}), 1)
+
+		toggle_post_like(self.post.name, user, False)
+		toggle_post_like(self.post.name, user, False)
+		self.assertEqual(self.get_likes(), (0, []))
+		self.assertFalse(frappe.db.exists("ESS Post Like", {"post": self.post.name}))
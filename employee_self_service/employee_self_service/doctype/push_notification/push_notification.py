@@ -5,74 +5,139 @@ import frappe
 import pyfcm
 from frappe.model.document import Document
 from pyfcm import FCMNotification
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from employee_self_service.mobile.v1.api_utils import get_ess_settings
+from employee_self_service.mobile.v1.notification_utils import update_unread_count
+from employee_self_service.employee_self_service.doctype.employee_device_info.employee_device_info import (
+    get_stale_tokens,
+    prune_device_tokens,
+)
 import json
 import datetime
 
+# FCM accepts at most 500 registration ids per multicast request
+FCM_MULTICAST_LIMIT = 500
+FCM_MAX_WORKERS = 4
+
 
 class PushNotification(Document):
     def after_insert(self):
-        server_key = frappe.db.get_single_value(
-            "Employee Self Service Settings", "firebase_server_key"
-        )
+        update_unread_count(self)
+        server_key = get_ess_settings().get("firebase_server_key")
         if not server_key:
             return
-        if self.send_for == "Single User":
-            token = frappe.db.get_value(
-                "Employee Device Info",
-                filters={"user": self.user},
-                fieldname="token",
-            )
-            if token:
-                self.response = json.dumps(
-                    send_single_notification(
-                        token,
-                        self.title,
-                        self.message,
-                        self.user,
-                        self.notification_type,
-                    )
+        # keep firebase latency out of the request/scheduler transaction
+        frappe.enqueue(
+            dispatch_push_notification,
+            queue="short",
+            notification=self.name,
+            enqueue_after_commit=True,
+        )
+
+
+def dispatch_push_notification(notification):
+    """
+    Send a Push Notification to all registered devices of its recipients.
+    Registration ids are chunked by the FCM multicast limit and the chunks
+    are sent concurrently on a bounded thread pool. The result of every
+    chunk is stored in `response`.
+    """
+    server_key = get_ess_settings().get("firebase_server_key")
+    if not server_key:
+        return
+    doc = frappe.get_doc("Push Notification", notification)
+
+    responses = []
+    with ThreadPoolExecutor(max_workers=FCM_MAX_WORKERS) as pool:
+        # send the chunks as they are read, at most FCM_MAX_WORKERS in flight
+        in_flight = deque()
+        for chunk in get_registration_id_chunks(doc):
+            if len(in_flight) >= FCM_MAX_WORKERS:
+                responses.append(in_flight.popleft().result())
+            in_flight.append(
+                pool.submit(
+                    send_chunk,
+                    server_key,
+                    chunk,
+                    doc.title,
+                    doc.message,
+                    doc.notification_type,
                 )
-                self.save()
-
-        elif self.send_for == "Multiple User":
-            users = [nu.user for nu in self.users]
-            registration_ids = frappe.db.get_list(
-                "Employee Device Info",
-                filters=[
-                    ["Employee Device Info", "user", "in", users],
-                    ["Employee Device Info", "token", "is", "set"],
-                ],
-                fields=["token"],
             )
-            if registration_ids:
-                registration_ids = [token["token"] for token in registration_ids]
-                self.response = json.dumps(
-                    send_multiple_notification(
-                        registration_ids,
-                        users,
-                        self.title,
-                        self.message,
-                        self.notification_type,
-                    )
-                )
-                self.save()
-        elif self.send_for == "All User":
-            registration_ids = frappe.db.get_list(
-                "Employee Device Info",
-                filters=[["Employee Device Info", "token", "is", "set"]],
-                fields=["token"],
+        responses.extend(future.result() for future in in_flight)
+    if not responses:
+        return
+
+    stale_tokens = []
+    for idx, response in enumerate(responses):
+        if response.get("error"):
+            frappe.log_error(
+                title="ESS Push Notification Error",
+                message=f"{doc.name} chunk {idx}: {response.get('error')}",
             )
-            if registration_ids:
-                registration_ids = [token["token"] for token in registration_ids]
-                self.response = json.dumps(
-                    send_multiple_notification(
-                        registration_ids,
-                        self.title,
-                        self.message,
-                        self.notification_type,
-                    )
-                )
-                self.save()
+        stale_tokens.extend(response.pop("stale_tokens", []))
+    # stop paying for devices firebase will never deliver to again
+    prune_device_tokens(stale_tokens)
+
+    frappe.db.set_value(
+        "Push Notification",
+        doc.name,
+        "response",
+        json.dumps(responses, default=str),
+        update_modified=False,
+    )
+
+
+def get_registration_id_chunks(doc):
+    filters = [["Employee Device Info", "token", "is", "set"]]
+    if doc.send_for == "Single User":
+        if not doc.user:
+            return
+        filters.append(["Employee Device Info", "user", "=", doc.user])
+    elif doc.send_for == "Multiple User":
+        users = [row.user for row in doc.users]
+        if not users:
+            return
+        filters.append(["Employee Device Info", "user", "in", users])
+
+    # page through the tokens so "All User" never loads every device at once
+    last_name = ""
+    while True:
+        rows = frappe.get_all(
+            "Employee Device Info",
+            filters=filters + [["Employee Device Info", "name", ">", last_name]],
+            fields=["name", "token"],
+            order_by="name asc",
+            limit=FCM_MULTICAST_LIMIT,
+        )
+        if not rows:
+            break
+        last_name = rows[-1].name
+        yield [row.token for row in rows]
+        if len(rows) < FCM_MULTICAST_LIMIT:
+            break
+
+
+def send_chunk(server_key, registration_ids, title, message, notification_type):
+    # runs in a worker thread, must not touch frappe.db
+    try:
+        push_service = FCMNotification(api_key=server_key)
+        response = push_service.notify_multiple_devices(
+            registration_ids=registration_ids,
+            message_title=title,
+            message_body=message,
+            data_message={"notification_type": notification_type},
+        )
+        return dict(
+            tokens=len(registration_ids),
+            success=response.get("success"),
+            failure=response.get("failure"),
+            results=response.get("results"),
+            stale_tokens=get_stale_tokens(registration_ids, response.get("results")),
+        )
+    except Exception as e:
+        return dict(tokens=len(registration_ids), error=str(e))
 
 
 @frappe.whitelist()
@@ -83,9 +148,7 @@ def send_single_notification(
     user=None,
     notification_type=None,
 ):
-    server_key = frappe.db.get_single_value(
-        "Employee Self Service Settings", "firebase_server_key"
-    )
+    server_key = get_ess_settings().get("firebase_server_key")
 
     push_service = FCMNotification(api_key=server_key)
     # push_service = FCMNotification(
@@ -112,9 +175,7 @@ def send_single_notification(
 def send_multiple_notification(
     registration_ids, users=None, title=None, message=None, notification_type=None
 ):
-    server_key = frappe.db.get_single_value(
-        "Employee Self Service Settings", "firebase_server_key"
-    )
+    server_key = get_ess_settings().get("firebase_server_key")
     push_service = FCMNotification(api_key=server_key)
     # push_service = FCMNotification(
     #     api_key="AAAAPcJ19TQ:APA91bH0IMYIyGdAAhH0SCEoXHr1gS4jjeaZgCsIcjr5uF5adQqiPG-QARbOx6XS4XOB3W3Km65xJUBo1W6jg8uLYcuHKSMcu-U7QurQLuEEOXHAu9eH9eLYg0RDtNOqYwEAIoOwBHqF"
@@ -132,11 +193,15 @@ def send_multiple_notification(
     )
 
 
-def create_push_notification(title, message, send_for, notification_type, user=None):
+def create_push_notification(
+    title, message, send_for, notification_type, user=None, users=None
+):
     push_notification_doc = frappe.new_doc("Push Notification")
     push_notification_doc.title = title
     push_notification_doc.message = message
     push_notification_doc.send_for = send_for
     push_notification_doc.user = user
     push_notification_doc.notification_type = notification_type
+    for row in users or []:
+        push_notification_doc.append("users", dict(user=row))
     push_notification_doc.save(ignore_permissions=True)
@@ -115,10 +115,84 @@ doctype_js = {"Employee Checkin": "public/js/employee_checkin.js"}
 # }
 doc_events = {
     "Leave Application": {
-        "on_update": "employee_self_service.mobile.ess.on_leave_application_update"
+        "on_update": "employee_self_service.mobile.ess.on_leave_application_update",
+        "on_change": [
+            "employee_self_service.mobile.v1.dashboard_utils.clear_dashboard_cache",
+            "employee_self_service.mobile.v1.leave_utils.clear_leave_balance_cache",
+        ],
+        "on_trash": [
+            "employee_self_service.mobile.v1.dashboard_utils.clear_dashboard_cache",
+            "employee_self_service.mobile.v1.leave_utils.clear_leave_balance_cache",
+        ],
+    },
+    "Leave Allocation": {
+        "on_change": "employee_self_service.mobile.v1.leave_utils.clear_leave_balance_cache",
+        "on_trash": "employee_self_service.mobile.v1.leave_utils.clear_leave_balance_cache",
+    },
+    "Leave Encashment": {
+        "on_change": "employee_self_service.mobile.v1.leave_utils.clear_leave_balance_cache",
+        "on_trash": "employee_self_service.mobile.v1.leave_utils.clear_leave_balance_cache",
     },
     "Expense Claim": {
-        "on_submit": "employee_self_service.mobile.ess.on_expense_submit"
+        "on_submit": "employee_self_service.mobile.ess.on_expense_submit",
+        "on_change": "employee_self_service.mobile.v1.dashboard_utils.clear_dashboard_cache",
+        "on_trash": "employee_self_service.mobile.v1.dashboard_utils.clear_dashboard_cache",
+    },
+    "Employee Checkin": {
+        "on_change": [
+            "employee_self_service.mobile.v1.dashboard_utils.clear_dashboard_cache",
+            "employee_self_service.mobile.v1.attendance_utils.clear_attendance_cache",
+        ],
+        "on_trash": [
+            "employee_self_service.mobile.v1.dashboard_utils.clear_dashboard_cache",
+            "employee_self_service.mobile.v1.attendance_utils.clear_attendance_cache",
+        ],
+    },
+    "Salary Slip": {
+        "on_submit": "employee_self_service.mobile.v1.salary_slip_utils.prerender_salary_slip",
+        "on_cancel": "employee_self_service.mobile.v1.salary_slip_utils.clear_salary_slip_pdf_cache",
+        "on_change": "employee_self_service.mobile.v1.dashboard_utils.clear_dashboard_cache",
+        "on_trash": [
+            "employee_self_service.mobile.v1.dashboard_utils.clear_dashboard_cache",
+            "employee_self_service.mobile.v1.salary_slip_utils.clear_salary_slip_pdf_cache",
+        ],
+    },
+    "Attendance": {
+        "on_submit": "employee_self_service.mobile.v1.attendance_utils.clear_attendance_summary",
+        "on_cancel": "employee_self_service.mobile.v1.attendance_utils.clear_attendance_summary",
+        "on_change": [
+            "employee_self_service.mobile.v1.dashboard_utils.clear_dashboard_cache",
+            "employee_self_service.mobile.v1.attendance_utils.clear_attendance_cache",
+        ],
+        "on_trash": [
+            "employee_self_service.mobile.v1.dashboard_utils.clear_dashboard_cache",
+            "employee_self_service.mobile.v1.attendance_utils.clear_attendance_cache",
+        ],
+    },
+    "Notice Board": {
+        "on_change": "employee_self_service.mobile.v1.dashboard_utils.clear_dashboard_cache",
+        "on_trash": "employee_self_service.mobile.v1.dashboard_utils.clear_dashboard_cache",
+    },
+    "Employee Self Service Settings": {
+        "on_update": [
+            "employee_self_service.mobile.v1.api_utils.clear_settings_cache",
+            "employee_self_service.mobile.v1.translation.clear_translation_cache",
+        ],
+    },
+    "Global Defaults": {
+        "on_update": "employee_self_service.mobile.v1.api_utils.clear_settings_cache",
+    },
+    "Ess Translation": {
+        "on_change": "employee_self_service.mobile.v1.translation.clear_translation_cache",
+        "on_trash": "employee_self_service.mobile.v1.translation.clear_translation_cache",
+    },
+    "Item Price": {
+        "on_change": "employee_self_service.mobile.v1.order.clear_item_price_cache",
+        "on_trash": "employee_self_service.mobile.v1.order.clear_item_price_cache",
+    },
+    "Comment": {
+        "after_insert": "employee_self_service.employee_self_service.doctype.ess_post_like.ess_post_like.update_comment_count",
+        "on_trash": "employee_self_service.employee_self_service.doctype.ess_post_like.ess_post_like.update_comment_count",
     },
     "ToDo": {
         "after_insert": "employee_self_service.mobile.ess.send_notification_for_task_assign"
@@ -134,8 +208,10 @@ doc_events = {
 scheduler_events = {
     "daily": ["employee_self_service.mobile.ess.daily_notice_board_event"],
     "cron": {
-        "0 9 * * *": ["employee_self_service.mobile.ess.send_notification_on_event"],
-        "0 9 * * *": ["employee_self_service.mobile.ess.on_holiday_event"],
+        "0 9 * * *": [
+            "employee_self_service.mobile.v1.ess.send_notification_on_event",
+            "employee_self_service.mobile.v1.ess.on_holiday_event",
+        ],
     },
 }
 
@@ -5,6 +5,8 @@ from frappe.utils import cstr
 
 import wrapt
 
+from employee_self_service.mobile.v1.api_utils import get_cached_settings
+
 
 def gen_response(status, message, data=[]):
     frappe.response["http_status_code"] = status
@@ -70,13 +72,11 @@ def validate_employee_data(employee_data):
 
 
 def get_ess_settings():
-    return frappe.get_doc(
-        "Employee Self Service Settings", "Employee Self Service Settings"
-    )
+    return get_cached_settings("Employee Self Service Settings")
 
 
 def get_global_defaults():
-    return frappe.get_doc("Global Defaults", "Global Defaults")
+    return get_cached_settings("Global Defaults")
 
 
 def remove_default_fields(data):
@@ -34,6 +34,9 @@ from erpnext.accounts.utils import get_fiscal_year
 from employee_self_service.employee_self_service.doctype.push_notification.push_notification import (
     create_push_notification,
 )
+from employee_self_service.employee_self_service.doctype.employee_device_info.employee_device_info import (
+    register_device,
+)
 
 
 @frappe.whitelist(allow_guest=True)
@@ -335,11 +338,7 @@ def download_salary_slip(ss_id):
             return gen_response(
                 500, "Does not have persmission to read this salary slip"
             )
-        default_print_format = frappe.db.get_value(
-            "Employee Self Service Settings",
-            "Employee Self Service Settings",
-            "default_print_format",
-        )
+        default_print_format = get_ess_settings().get("default_print_format")
         if not default_print_format:
             default_print_format = (
                 frappe.db.get_value(
@@ -1359,31 +1358,14 @@ def upcoming_activity(date=None):
 def employee_device_info(**kwargs):
     try:
         data = kwargs
-        existing_token = frappe.db.get_value(
-            "Employee Device Info",
-            filters={"user": frappe.session.user},
-            fieldname="name",
+        register_device(
+            user=frappe.session.user,
+            token=data.get("token"),
+            platform=data.get("platform"),
+            os_version=data.get("os_version"),
+            device_name=data.get("device_name"),
+            app_version=data.get("app_version"),
         )
-        if frappe.db.exists("Employee Device Info", existing_token):
-            token = frappe.get_doc("Employee Device Info", existing_token)
-            token.platform = data.get("platform")
-            token.os_version = data.get("os_version")
-            token.device_name = data.get("device_name")
-            token.app_version = data.get("app_version")
-            token.token = data.get("token")
-            token.save(ignore_permissions=True)
-        else:
-            token = frappe.get_doc(
-                dict(
-                    doctype="Employee Device Info",
-                    platform=data.get("platform"),
-                    os_version=data.get("os_version"),
-                    device_name=data.get("device_name"),
-                    app_version=data.get("app_version"),
-                    token=data.get("token"),
-                    user=frappe.session.user,
-                )
-            ).insert(ignore_permissions=True)
 
         return gen_response(200, "Firebase Token Generated successfully")
     except Exception as e:
@@ -1456,7 +1438,7 @@ def send_notification_on_event():
 
 
 def global_holiday_list(date=None):
-    global_company = frappe.db.get_single_value("Global Defaults", "default_company")
+    global_company = get_global_defaults().get("default_company")
     employee_holiday_list = frappe.get_all(
         "Employee",
         {"company": global_company, "holiday_list": ("!=", "")},
@@ -1,10 +1,14 @@
 import frappe
 from bs4 import BeautifulSoup
 from frappe import _
-from frappe.utils import cstr
+from frappe.utils import cstr, fmt_money
 
 import wrapt
 
+SETTINGS_CACHE_KEY = "ess_settings_snapshot"
+# process local copies of the settings snapshots, keyed by (site, doctype)
+_settings_snapshot = {}
+
 
 def gen_response(status, message, data=[]):
     frappe.response["http_status_code"] = status
@@ -70,13 +74,64 @@ def validate_employee_data(employee_data):
 
 
 def get_ess_settings():
-    return frappe.get_doc(
-        "Employee Self Service Settings", "Employee Self Service Settings"
-    )
+    return get_cached_settings("Employee Self Service Settings")
 
 
 def get_global_defaults():
-    return frappe.get_doc("Global Defaults", "Global Defaults")
+    return get_cached_settings("Global Defaults")
+
+
+def get_cached_settings(doctype):
+    """
+    Read only snapshot of a single doctype. Kept in redis and in process
+    memory, the process copy is checked against a version stamp in redis
+    so a request never loads the singleton from the database.
+    """
+    version = frappe.cache().get_value(f"{SETTINGS_CACHE_KEY}:{doctype}")
+    local_key = (frappe.local.site, doctype)
+    local_snapshot = _settings_snapshot.get(local_key)
+    if local_snapshot and local_snapshot.version == version:
+        return local_snapshot.data
+
+    snapshot = frappe.cache().hget(SETTINGS_CACHE_KEY, doctype)
+    if not snapshot or snapshot.version != version:
+        snapshot = frappe._dict(
+            version=version, data=frappe.get_doc(doctype, doctype).as_dict()
+        )
+        frappe.cache().hset(SETTINGS_CACHE_KEY, doctype, snapshot)
+    _settings_snapshot[local_key] = snapshot
+    return snapshot.data
+
+
+def clear_settings_cache(doc, method=None):
+    # after the commit, or a concurrent miss could cache the old row under
+    # the new version
+    frappe.db.after_commit.add(lambda: bump_settings_version(doc.doctype))
+
+
+def bump_settings_version(doctype):
+    frappe.cache().hdel(SETTINGS_CACHE_KEY, doctype)
+    frappe.cache().set_value(
+        f"{SETTINGS_CACHE_KEY}:{doctype}", frappe.generate_hash(length=10)
+    )
+
+
+def clear_cache_after_commit(key, fields=None):
+    """
+    Drop `fields` of the redis hash `key`, or the whole key when `fields` is
+    None, once the transaction commits. Dropped before the commit, a
+    concurrent miss would cache the rows the transaction is about to change.
+    """
+    fields = None if fields is None else set(filter(None, fields))
+
+    def clear():
+        if fields is None:
+            frappe.cache().delete_key(key)
+            return
+        for field in fields:
+            frappe.cache().hdel(key, field)
+
+    frappe.db.after_commit.add(clear)
 
 
 def remove_default_fields(data):
@@ -124,6 +179,61 @@ def get_actions(doc, doc_data=None):
     return actions
 
 
+def get_attachment_map(doctype, names):
+    """File urls attached to each of `names`, in one query."""
+    attachments = {}
+    if not names:
+        return attachments
+    for file in frappe.get_all(
+        "File",
+        filters={
+            "attached_to_doctype": doctype,
+            "attached_to_name": ["in", names],
+            "is_folder": 0,
+        },
+        fields=["attached_to_name", "file_url"],
+    ):
+        attachments.setdefault(file.attached_to_name, []).append(
+            {"file_url": file.file_url}
+        )
+    return attachments
+
+
+def get_expense_detail_map(expense_claims):
+    """First Expense Claim Detail of each claim, in one query."""
+    details = {}
+    if not expense_claims:
+        return details
+    for detail in frappe.get_all(
+        "Expense Claim Detail",
+        filters={"parent": ["in", expense_claims], "parenttype": "Expense Claim"},
+        fields=["parent", "expense_type", "description", "expense_date"],
+        order_by="idx asc",
+    ):
+        details.setdefault(detail.parent, detail)
+    return details
+
+
+def set_expense_details(expense_list):
+    """Set the first detail and format the dates and amount of each claim."""
+    global_defaults = get_global_defaults()
+    details = get_expense_detail_map([expense.name for expense in expense_list])
+    for expense in expense_list:
+        detail = details.get(expense.name) or {}
+        expense["expense_type"] = detail.get("expense_type")
+        expense["expense_description"] = detail.get("description")
+        expense["expense_date"] = (
+            detail["expense_date"].strftime("%d-%m-%Y")
+            if detail.get("expense_date")
+            else None
+        )
+        expense["posting_date"] = expense["posting_date"].strftime("%d-%m-%Y")
+        expense["total_claimed_amount"] = fmt_money(
+            expense["total_claimed_amount"],
+            currency=global_defaults.get("default_currency"),
+        )
+
+
 def check_workflow_exists(doctype):
     doc_workflow = frappe.get_all(
         "Workflow",
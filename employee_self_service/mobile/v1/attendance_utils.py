@@ -0,0 +1,171 @@
+import calendar
+import frappe
+from frappe.utils import getdate, today, get_first_day, get_last_day
+from employee_self_service.mobile.v1.api_utils import clear_cache_after_commit
+
+ATTENDANCE_CACHE_KEY = "ess_attendance_month"
+ATTENDANCE_SUMMARY_KEY = "ess_attendance_summary"
+# bounds how long a count filled next to a concurrent submit can stay stale
+ATTENDANCE_SUMMARY_EXPIRY = 6 * 60 * 60
+
+
+def get_attendance_month(employee, year, month):
+    """
+    Attendance records of `employee` for the month with their checkins and
+    the present/absent/late counts. Closed months can not change anymore
+    (short of an amendment, see clear_attendance_cache) and are cached.
+    """
+    year, month = int(year), int(month)
+    days_in_month = calendar.monthrange(year, month)[1]
+    if getdate(f"{year}-{month}-{days_in_month}") >= getdate(today()):
+        return build_attendance_month(employee, year, month)
+
+    key = get_attendance_cache_field(employee, year, month)
+    attendance_data = frappe.cache().hget(ATTENDANCE_CACHE_KEY, key)
+    if attendance_data is None:
+        attendance_data = build_attendance_month(employee, year, month)
+        frappe.cache().hset(ATTENDANCE_CACHE_KEY, key, attendance_data)
+    return attendance_data
+
+
+def build_attendance_month(employee, year, month):
+    days_in_month = calendar.monthrange(year, month)[1]
+    attendance_list = frappe.get_all(
+        "Attendance",
+        filters={
+            "employee": employee,
+            "attendance_date": [
+                "between",
+                [f"{year}-{month}-01", f"{year}-{month}-{days_in_month}"],
+            ],
+        },
+        fields=[
+            "name",
+            "DATE_FORMAT(attendance_date, '%d %W') AS attendance_date",
+            "status",
+            "working_hours",
+            "in_time",
+            "out_time",
+            "late_entry",
+        ],
+    )
+
+    checkins = {}
+    if attendance_list:
+        for checkin in frappe.get_all(
+            "Employee Checkin",
+            filters={"attendance": ["in", [row.name for row in attendance_list]]},
+            fields=["attendance", "log_type", "time_format(time, '%h:%i%p') as time"],
+        ):
+            checkins.setdefault(checkin.pop("attendance"), []).append(checkin)
+
+    present_count = absent_count = late_count = 0
+    for attendance in attendance_list:
+        attendance["employee_checkin_detail"] = checkins.get(attendance.name, [])
+        if attendance.status == "Present":
+            present_count += 1
+            if attendance.late_entry == 1:
+                late_count += 1
+        elif attendance.status == "Absent":
+            absent_count += 1
+
+        del attendance["name"]
+        del attendance["status"]
+        del attendance["late_entry"]
+
+    return {
+        "attendance_details": {
+            "days_in_month": days_in_month,
+            "present": present_count,
+            "absent": absent_count,
+            "late": late_count,
+        },
+        "attendance_list": attendance_list,
+    }
+
+
+def get_attendance_cache_field(employee, year, month):
+    return f"{employee}:{int(year)}-{int(month):02d}"
+
+
+def clear_attendance_cache(doc, method=None):
+    date = getdate(doc.attendance_date if doc.doctype == "Attendance" else doc.time)
+    clear_cache_after_commit(
+        ATTENDANCE_CACHE_KEY,
+        [get_attendance_cache_field(doc.employee, date.year, date.month)],
+    )
+
+
+def get_attendance_summary(employee, date=None):
+    """
+    Month summary of `employee` with the totals the summarized view of the
+    Monthly Attendance Sheet report returns. The attendance counts are cached
+    in redis until an Attendance of the month is submitted or cancelled, the
+    holidays are one COUNT query.
+    """
+    date = getdate(date)
+    first_day, last_day = get_first_day(date), get_last_day(date)
+    counts = get_attendance_counts(employee, first_day, last_day)
+    # like the report, no row for an employee without attendance in the month
+    if not any(counts.values()):
+        return None
+    half_days = 0.5 * counts.get("Half Day", 0)
+    return frappe._dict(
+        total_present=counts.get("Present", 0)
+        + counts.get("Work From Home", 0)
+        + half_days,
+        total_leaves=counts.get("On Leave", 0) + half_days,
+        total_absent=counts.get("Absent", 0),
+        total_holidays=get_unmarked_holiday_count(employee, first_day, last_day),
+    )
+
+
+def get_attendance_counts(employee, first_day, last_day):
+    key = get_attendance_summary_key(employee, first_day)
+    counts = frappe.cache().get_value(key)
+    if counts is None:
+        counts = dict(
+            frappe.db.sql(
+                """SELECT status, COUNT(name)
+                FROM `tabAttendance`
+                WHERE employee = %(employee)s
+                AND docstatus = 1
+                AND attendance_date BETWEEN %(first_day)s AND %(last_day)s
+                GROUP BY status""",
+                dict(employee=employee, first_day=first_day, last_day=last_day),
+            )
+        )
+        frappe.cache().set_value(key, counts, expires_in_sec=ATTENDANCE_SUMMARY_EXPIRY)
+    return counts
+
+
+def get_unmarked_holiday_count(employee, first_day, last_day):
+    # holidays of the employee's (or else the company's) holiday list
+    # without a submitted attendance, as the report counts them
+    return frappe.db.sql(
+        """SELECT COUNT(holiday.name)
+        FROM `tabEmployee` employee
+        INNER JOIN `tabCompany` company ON company.name = employee.company
+        INNER JOIN `tabHoliday` holiday
+            ON holiday.parent = COALESCE(NULLIF(employee.holiday_list, ''), company.default_holiday_list)
+        WHERE employee.name = %(employee)s
+        AND holiday.holiday_date BETWEEN %(first_day)s AND %(last_day)s
+        AND NOT EXISTS (
+            SELECT 1 FROM `tabAttendance` attendance
+            WHERE attendance.employee = employee.name
+            AND attendance.attendance_date = holiday.holiday_date
+            AND attendance.docstatus = 1
+        )""",
+        dict(employee=employee, first_day=first_day, last_day=last_day),
+    )[0][0]
+
+
+def get_attendance_summary_key(employee, date):
+    date = getdate(date)
+    return f"{ATTENDANCE_SUMMARY_KEY}:{employee}:{date.year}-{date.month:02d}"
+
+
+def clear_attendance_summary(doc, method=None):
+    # after the commit, a rolled back submit must not change the counts
+    key = get_attendance_summary_key(doc.employee, doc.attendance_date)
+    frappe.db.after_commit.add(lambda: frappe.cache().delete_value(key))
@@ -0,0 +1,350 @@
+"""
+Query count and timing benchmarks for the mobile api.
+
+Run against a site with:
+    bench --site <site_name> execute employee_self_service.mobile.v1.benchmark.dashboard --kwargs "{'user': 'employee@example.com'}"
+"""
+import time
+from contextlib import contextmanager
+
+import frappe
+from employee_self_service.mobile.v1.api_utils import get_employee_by_user
+
+
+@contextmanager
+def count_queries():
+    counter = frappe._dict(count=0)
+    sql = frappe.db.sql
+
+    def _sql(*args, **kwargs):
+        counter.count += 1
+        return sql(*args, **kwargs)
+
+    frappe.db.sql = _sql
+    try:
+        yield counter
+    finally:
+        del frappe.db.sql
+
+
+def run_benchmark(title, method, runs=20):
+    # first call warms up the document and redis caches
+    method()
+    timings = []
+    with count_queries() as counter:
+        for _ in range(runs):
+            start = time.perf_counter()
+            method()
+            timings.append(time.perf_counter() - start)
+    result = frappe._dict(
+        title=title,
+        runs=runs,
+        queries_per_call=counter.count / runs,
+        avg_ms=1000 * sum(timings) / runs,
+        max_ms=1000 * max(timings),
+    )
+    print(
+        f"{result.title}: {result.queries_per_call:.1f} queries/call, "
+        f"avg {result.avg_ms:.2f}ms, max {result.max_ms:.2f}ms over {runs} runs"
+    )
+    return result
+
+
+def dashboard(user=None, runs=20):
+    from employee_self_service.mobile.v1.dashboard_utils import (
+        DASHBOARD_CACHE_KEY,
+        get_dashboard_data,
+    )
+
+    if user:
+        frappe.set_user(user)
+    emp_data = get_employee_by_user(
+        frappe.session.user, fields=["name", "company", "image", "employee_name"]
+    )
+
+    def uncached_dashboard():
+        # drop the section cache so every call runs the LIMIT 1 queries
+        frappe.cache().hdel(DASHBOARD_CACHE_KEY, emp_data.get("name"))
+        return get_dashboard_data(emp_data)
+
+    return [
+        run_benchmark("get_dashboard (uncached)", uncached_dashboard, runs=runs),
+        run_benchmark(
+            "get_dashboard (cached)", lambda: get_dashboard_data(emp_data), runs=runs
+        ),
+    ]
+
+
+def task_list(user=None, page_lengths=(10, 50, 100), runs=10):
+    from employee_self_service.mobile.v1.task_utils import enrich_tasks
+
+    if user:
+        frappe.set_user(user)
+    results = []
+    for page_length in page_lengths:
+        tasks = frappe.get_list(
+            "Task",
+            fields=["name", "project", "exp_end_date", "_assign as assigned_to", "owner as assigned_by"],
+            page_length=page_length,
+            order_by="modified desc",
+        )
+        results.append(
+            run_benchmark(
+                f"get_task_list ({len(tasks)} tasks)",
+                lambda: enrich_tasks([frappe._dict(task) for task in tasks]),
+                runs=runs,
+            )
+        )
+    return results
+
+
+def task_comments(rows=500000, tasks=20000, runs=10):
+    """
+    Fill tabComment with `rows` synthetic comments spread over several
+    doctypes, compare the old LIKE lookup with the exact match path and roll
+    the rows back.
+    """
+    from frappe.utils import now
+    from employee_self_service.mobile.v1.task_utils import (
+        get_comment_count_map,
+        get_task_comments,
+    )
+
+    # add_index commits, make sure the index exists before the synthetic rows
+    from employee_self_service.setup import create_indexes
+
+    create_indexes()
+    reference_doctypes = ["Task", "Sales Order", "Issue", "Project", "ToDo"]
+    timestamp = now()
+    values = []
+    for i in range(rows):
+        values.append(
+            (
+                f"bench-comment-{i}",
+                timestamp,
+                timestamp,
+                "Administrator",
+                "Administrator",
+                "Comment",
+                reference_doctypes[i % len(reference_doctypes)],
+                f"TASK-BENCH-{i % tasks}",
+                "benchmark comment",
+                "Administrator",
+            )
+        )
+    task = "TASK-BENCH-1"
+    try:
+        frappe.db.bulk_insert(
+            "Comment",
+            [
+                "name",
+                "creation",
+                "modified",
+                "modified_by",
+                "owner",
+                "comment_type",
+                "reference_doctype",
+                "reference_name",
+                "content",
+                "comment_email",
+            ],
+            values,
+        )
+        like_comments = frappe.get_all(
+            "Comment",
+            filters={
+                "reference_name": ["like", f"%{task}%"],
+                "comment_type": "Comment",
+            },
+            pluck="name",
+        )
+        print(
+            f"LIKE matched {len(like_comments)} comments, exact match "
+            f"{get_comment_count_map([task]).get(task, 0)}"
+        )
+        return [
+            run_benchmark(
+                f"LIKE lookup ({rows} comments)",
+                lambda: frappe.get_all(
+                    "Comment",
+                    filters={
+                        "reference_name": ["like", f"%{task}%"],
+                        "comment_type": "Comment",
+                    },
+                    fields=["content as comment", "comment_email", "creation"],
+                ),
+                runs=runs,
+            ),
+            run_benchmark(
+                f"exact count ({rows} comments)",
+                lambda: get_comment_count_map([task]),
+                runs=runs,
+            ),
+            run_benchmark(
+                f"exact first page ({rows} comments)",
+                lambda: get_task_comments(task),
+                runs=runs,
+            ),
+        ]
+    finally:
+        frappe.db.rollback()
+
+
+def holiday_list(employees=50000, holiday_lists=20, runs=5):
+    """
+    Compare the per employee Holiday lookups global_holiday_list used to do
+    with the joined query, over `employees` synthetic employees. The rows
+    are rolled back.
+    """
+    from frappe.utils import now, today
+    from employee_self_service.mobile.v1.ess import global_holiday_list
+    from employee_self_service.setup import create_indexes
+
+    create_indexes()
+    company = frappe.db.get_single_value("Global Defaults", "default_company")
+    timestamp = now()
+    try:
+        frappe.db.bulk_insert(
+            "Holiday",
+            [
+                "name",
+                "creation",
+                "modified",
+                "owner",
+                "modified_by",
+                "parent",
+                "parenttype",
+                "parentfield",
+                "holiday_date",
+                "description",
+            ],
+            [
+                (
+                    f"bench-holiday-{i}",
+                    timestamp,
+                    timestamp,
+                    "Administrator",
+                    "Administrator",
+                    f"BENCH-HL-{i}",
+                    "Holiday List",
+                    "holidays",
+                    today(),
+                    "Benchmark Holiday",
+                )
+                for i in range(holiday_lists)
+            ],
+        )
+        frappe.db.bulk_insert(
+            "Employee",
+            [
+                "name",
+                "creation",
+                "modified",
+                "owner",
+                "modified_by",
+                "employee_name",
+                "first_name",
+                "company",
+                "status",
+                "holiday_list",
+                "user_id",
+            ],
+            [
+                (
+                    f"BENCH-EMP-{i}",
+                    timestamp,
+                    timestamp,
+                    "Administrator",
+                    "Administrator",
+                    f"Benchmark {i}",
+                    f"Benchmark {i}",
+                    company,
+                    "Active",
+                    f"BENCH-HL-{i % holiday_lists}",
+                    f"bench-{i}@example.com",
+                )
+                for i in range(employees)
+            ],
+        )
+
+        def per_employee_holiday_list():
+            holidays = []
+            for employee in frappe.get_all(
+                "Employee",
+                {"company": company, "holiday_list": ("!=", "")},
+                ["holiday_list", "user_id"],
+            ):
+                for holiday in frappe.get_all(
+                    "Holiday",
+                    filters={"holiday_date": today(), "parent": employee.holiday_list},
+                    fields=["'holiday' as title", "description"],
+                ):
+                    holiday["user_id"] = employee.user_id
+                    holidays.append(holiday)
+            return holidays
+
+        return [
+            run_benchmark(
+                f"per employee holiday list ({employees} employees)",
+                per_employee_holiday_list,
+                runs=1,
+            ),
+            run_benchmark(
+                f"global_holiday_list ({employees} employees)",
+                lambda: global_holiday_list(today()),
+                runs=runs,
+            ),
+        ]
+    finally:
+        frappe.db.rollback()
+
+
+def leave_balance(user=None, runs=20):
+    from frappe.desk.query_report import run
+    from frappe.utils import add_days, today
+    from employee_self_service.mobile.v1.leave_utils import (
+        build_leave_balances,
+        get_leave_balances,
+    )
+
+    if user:
+        frappe.set_user(user)
+    emp_data = get_employee_by_user(frappe.session.user, fields=["name", "company"])
+    filters = {
+        "from_date": today(),
+        "to_date": add_days(today(), 1),
+        "company": emp_data.get("company"),
+        "employee": emp_data.get("name"),
+    }
+    return [
+        run_benchmark(
+            "Employee Leave Balance report",
+            lambda: run("Employee Leave Balance", filters=filters),
+            runs=runs,
+        ),
+        run_benchmark(
+            "build_leave_balances",
+            lambda: build_leave_balances(emp_data.get("name"), today()),
+            runs=runs,
+        ),
+        run_benchmark(
+            "get_leave_balances (cached)",
+            lambda: get_leave_balances(emp_data.get("name")),
+            runs=runs,
+        ),
+    ]
+
+
+def feed(user=None, page_lengths=(10, 50), runs=10):
+    from employee_self_service.mobile.v1.feed_utils import get_feed_page
+
+    if user:
+        frappe.set_user(user)
+    return [
+        run_benchmark(
+            f"get_feed ({page_length} posts per page)",
+            lambda: get_feed_page([["publish", "=", 1]], page_length=page_length),
+            runs=runs,
+        )
+        for page_length in page_lengths
+    ]
@@ -0,0 +1,214 @@
+import frappe
+from frappe.utils import today, getdate, fmt_money, cint, flt
+from employee_self_service.mobile.v1.api_utils import (
+    clear_cache_after_commit,
+    get_ess_settings,
+    get_global_defaults,
+)
+
+DASHBOARD_CACHE_KEY = "ess_dashboard_cache"
+DASHBOARD_CACHE_STATS = ("hits", "misses")
+
+
+def get_dashboard_data(emp_data):
+    """
+    Build the get_dashboard payload with a fixed number of LIMIT 1 queries,
+    one per section, whatever the history of the employee.
+    """
+    employee = emp_data.get("name")
+    settings = get_ess_settings()
+    sections = get_cached_section(
+        employee, "dashboard", lambda: get_employee_sections(employee)
+    )
+    last_log = sections.get("last_log")
+    dashboard_data = {
+        "notice_board": sections.get("notice_board"),
+        "leave_balance": [],
+        "latest_leave": {},
+        "latest_expense": sections.get("latest_expense"),
+        "latest_salary_slip": sections.get("latest_salary_slip"),
+        "stop_location_validate": settings.get("location_validate"),
+        "last_log_type": last_log.get("log_type"),
+        "version": settings.get("version") or "1.0",
+        "update_version_forcefully": settings.get("update_version_forcefully") or 1,
+        "company": emp_data.get("company") or "Employee Dashboard",
+        "last_log_time": last_log.get("time").strftime("%I:%M%p")
+        if last_log.get("time")
+        else "",
+        "check_in_with_image": settings.get("check_in_with_image"),
+        "check_in_with_location": settings.get("check_in_with_location"),
+        "quick_task": settings.get("quick_task"),
+        "allow_odometer_reading_input": settings.get("allow_odometer_reading_input"),
+        "employee_image": emp_data.get("image"),
+        "employee_name": emp_data.get("employee_name"),
+    }
+    return dashboard_data
+
+
+def get_employee_sections(employee):
+    currency = get_global_defaults().get("default_currency")
+    return {
+        "notice_board": get_notice_board(employee),
+        "last_log": get_last_log(employee),
+        "latest_expense": get_latest_expense(employee, currency),
+        "latest_salary_slip": get_latest_salary_slip(employee, currency),
+    }
+
+
+def get_cached_section(employee, section, build_section):
+    """
+    Per employee cache of the dashboard sections, kept in one redis hash.
+    Entries are only valid for the day they were built since the sections
+    depend on today, and are dropped by `clear_dashboard_cache`.
+    """
+    cached = frappe.cache().hget(DASHBOARD_CACHE_KEY, employee) or {}
+    if cached.get("date") != today():
+        cached = {"date": today()}
+    if section in cached:
+        update_dashboard_cache_stats("hits")
+        return cached[section]
+
+    update_dashboard_cache_stats("misses")
+    cached[section] = build_section()
+    frappe.cache().hset(DASHBOARD_CACHE_KEY, employee, cached)
+    return cached[section]
+
+
+def update_dashboard_cache_stats(stat):
+    frappe.cache().incr(frappe.cache().make_key(f"{DASHBOARD_CACHE_KEY}:{stat}"))
+
+
+@frappe.whitelist()
+def get_dashboard_cache_stats():
+    frappe.only_for("System Manager")
+    stats = {}
+    for stat in DASHBOARD_CACHE_STATS:
+        stats[stat] = cint(
+            frappe.cache().get(frappe.cache().make_key(f"{DASHBOARD_CACHE_KEY}:{stat}"))
+        )
+    total = stats["hits"] + stats["misses"]
+    stats["hit_ratio"] = flt(stats["hits"] / total, 4) if total else 0
+    return stats
+
+
+def clear_dashboard_cache(doc, method=None):
+    if doc.doctype == "Notice Board":
+        # the notice may have been shown to the employees it had before
+        # the save as well, removed rows or an "All Employee" notice
+        notices = list(filter(None, [doc, doc.get_doc_before_save()]))
+        if any(notice.apply_for != "Specific Employees" for notice in notices):
+            clear_cache_after_commit(DASHBOARD_CACHE_KEY)
+            return
+        clear_cache_after_commit(
+            DASHBOARD_CACHE_KEY,
+            [row.employee for notice in notices for row in notice.get("employees")],
+        )
+    elif doc.get("employee"):
+        clear_cache_after_commit(DASHBOARD_CACHE_KEY, [doc.employee])
+
+
+def get_notice_board(employee, date=None):
+    # employee specific notices first, then the ones for all employees
+    return frappe.db.sql(
+        """SELECT nb.notice_title AS title,
+        nb.message
+        FROM `tabNotice Board` nb
+        WHERE nb.from_date <= %(date)s
+        AND nb.to_date >= %(date)s
+        AND (
+            nb.apply_for = 'All Employee'
+            OR (
+                nb.apply_for = 'Specific Employees'
+                AND EXISTS (
+                    SELECT 1 FROM `tabNotice Board Employee` nbe
+                    WHERE nbe.parent = nb.name
+                    AND nbe.parenttype = 'Notice Board'
+                    AND nbe.employee = %(employee)s
+                )
+            )
+        )
+        ORDER BY nb.apply_for = 'All Employee', nb.modified DESC""",
+        dict(employee=employee, date=getdate(date)),
+        as_dict=1,
+    )
+
+
+def get_last_log(employee):
+    """
+    Latest checkin of the employee. `log_type` falls back to OUT when the
+    employee never checked in, `time` is only set for a checkin of today.
+    """
+    last_log = frappe.db.sql(
+        """SELECT log_type,
+        time
+        FROM `tabEmployee Checkin`
+        WHERE employee=%s
+        ORDER BY time DESC
+        LIMIT 1""",
+        employee,
+        as_dict=1,
+    )
+    if not last_log:
+        return {"log_type": "OUT", "time": None}
+    last_log = last_log[0]
+    if getdate(last_log.time) != getdate(today()):
+        last_log["time"] = None
+    return last_log
+
+
+def get_latest_expense(employee, currency=None):
+    expense = frappe.db.sql(
+        """SELECT ec.name,
+        ec.approval_status,
+        ecd.expense_date,
+        ecd.expense_type,
+        ecd.amount
+        FROM `tabExpense Claim` ec
+        LEFT JOIN `tabExpense Claim Detail` ecd
+            ON ecd.parent = ec.name
+            AND ecd.parenttype = 'Expense Claim'
+            AND ecd.idx = 1
+        WHERE ec.employee=%s
+        ORDER BY ec.modified DESC
+        LIMIT 1""",
+        employee,
+        as_dict=1,
+    )
+    if not expense:
+        return {}
+    expense = expense[0]
+    return dict(
+        status=expense.approval_status,
+        date=expense.expense_date.strftime("%d-%m-%Y")
+        if expense.expense_date
+        else "",
+        expense_type=expense.expense_type,
+        amount=fmt_money(expense.amount, currency=currency),
+        name=expense.name,
+    )
+
+
+def get_latest_salary_slip(employee, currency=None):
+    salary_slip = frappe.db.sql(
+        """SELECT name,
+        posting_date,
+        gross_pay,
+        total_working_days
+        FROM `tabSalary Slip`
+        WHERE employee=%s
+        ORDER BY modified DESC
+        LIMIT 1""",
+        employee,
+        as_dict=1,
+    )
+    if not salary_slip:
+        return {}
+    salary_slip = salary_slip[0]
+    posting_date = getdate(salary_slip.posting_date)
+    return dict(
+        name=salary_slip.name,
+        month_year=f"{posting_date.strftime('%B')} {posting_date.year}",
+        posting_date=posting_date.strftime("%d-%m-%Y"),
+        amount=fmt_money(salary_slip.gross_pay, currency=currency),
+        total_working_days=salary_slip.total_working_days,
+    )
@@ -1,14 +1,11 @@
 import json
 import os
-import calendar
 import frappe
 from frappe import _
 from frappe.auth import LoginManager
 from frappe.utils import (
-    cstr,
     get_date_str,
     today,
-    nowdate,
     getdate,
     now_datetime,
     get_first_day,
@@ -17,8 +14,8 @@ from frappe.utils import (
     flt,
     pretty_date,
     fmt_money,
-    add_days,
     format_time,
+    cint,
 )
 from employee_self_service.mobile.v1.api_utils import (
     gen_response,
@@ -29,13 +26,41 @@ from employee_self_service.mobile.v1.api_utils import (
     get_ess_settings,
     get_global_defaults,
     exception_handler,
+    get_attachment_map,
+    set_expense_details,
 )
 from frappe.handler import upload_file
-from erpnext.accounts.utils import get_fiscal_year
 
+from employee_self_service.mobile.v1.attendance_utils import (
+    get_attendance_month,
+    get_attendance_summary,
+)
+from employee_self_service.mobile.v1.dashboard_utils import (
+    get_dashboard_data,
+    get_cached_section,
+)
+from employee_self_service.mobile.v1.leave_utils import (
+    get_leave_balances,
+    get_leave_balance_map,
+)
+from employee_self_service.mobile.v1.notification_utils import (
+    get_inbox,
+    get_unread_count,
+    mark_all_read,
+)
+from employee_self_service.mobile.v1.salary_slip_utils import get_salary_slip_pdf
+from employee_self_service.mobile.v1.task_utils import (
+    enrich_tasks,
+    get_task_comments,
+    get_comment_count_map,
+    get_assigned_tasks,
+)
 from employee_self_service.employee_self_service.doctype.push_notification.push_notification import (
     create_push_notification,
 )
+from employee_self_service.employee_self_service.doctype.employee_device_info.employee_device_info import (
+    register_device,
+)
 
 
 @frappe.whitelist(allow_guest=True)
@@ -94,23 +119,13 @@ def make_leave_application(*args, **kwargs):
 @ess_validate(methods=["GET"])
 def get_leave_type(from_date=None, to_date=None):
     try:
-        from hrms.hr.doctype.leave_application.leave_application import (
-            get_leave_balance_on,
-        )
-
-        if not from_date:
-            from_date = today()
         emp_data = get_employee_by_user(frappe.session.user)
         leave_types = frappe.get_all(
             "Leave Type", filters={}, fields=["name", "'0' as balance"]
         )
+        balance = get_leave_balance_map(emp_data.get("name"), from_date)
         for leave_type in leave_types:
-            leave_type["balance"] = get_leave_balance_on(
-                emp_data.get("name"),
-                leave_type.get("name"),
-                from_date,
-                consider_all_leaves_in_the_allocation_period=True,
-            )
+            leave_type["balance"] = balance.get(leave_type.get("name"), 0)
         return gen_response(200, "Leave type get successfully", leave_types)
     except Exception as e:
         return exception_handler(e)
@@ -120,7 +135,7 @@ def get_leave_type(from_date=None, to_date=None):
 @ess_validate(methods=["GET"])
 def get_leave_application_list():
     """
-    Get Leave Application which is already applied. Get Leave Balance Report
+    Get Leave Application which is already applied and the leave balance.
     """
     try:
         emp_data = get_employee_by_user(frappe.session.user)
@@ -146,37 +161,16 @@ def get_leave_application_list():
             fields=leave_application_fields,
             filters={"from_date": ["<=", today()], "employee": emp_data.get("name")},
         )
-        fiscal_year = get_fiscal_year(nowdate())[0]
-        if not fiscal_year:
-            return gen_response(500, "Fiscal year not set")
-        res = get_leave_balance_report(
-            emp_data.get("name"), emp_data.get("company"), fiscal_year
-        )
         leave_applications = {
             "upcoming": upcoming_leaves,
             "taken": taken_leaves,
-            "balance": res["result"],
+            "balance": get_leave_balances(emp_data.get("name")),
         }
         return gen_response(200, "Leave data getting successfully", leave_applications)
     except Exception as e:
         return exception_handler(e)
 
 
-def get_leave_balance_report(employee, company, fiscal_year):
-    # fiscal_year = get_fiscal_year(fiscal_year=fiscal_year, as_dict=True)
-    # year_start_date = get_date_str(fiscal_year.get("year_start_date"))
-    # year_end_date = get_date_str(fiscal_year.get("year_end_date"))
-    filters_leave_balance = {
-        "from_date": today(),
-        "to_date": add_days(today(), 1),
-        "company": company,
-        "employee": employee,
-    }
-    from frappe.desk.query_report import run
-
-    return run("Employee Leave Balance", filters=filters_leave_balance)
-
-
 @frappe.whitelist()
 def get_expense_type():
     try:
@@ -248,50 +242,58 @@ def get_payable_account(company):
 
 @frappe.whitelist()
 @ess_validate(methods=["GET"])
-def get_expense_list():
+def get_expense_list(start=0, page_length=6):
+    """
+    Expense claims of the employee grouped by posting month, paginated by
+    month: `start` and `page_length` count months, newest first.
+    """
     try:
-        global_defaults = get_global_defaults()
         emp_data = get_employee_by_user(frappe.session.user)
         if not len(emp_data) >= 1:
             return gen_response(500, "Employee does not exists")
         validate_employee_data(emp_data)
+        months = frappe.db.sql(
+            """SELECT MIN(posting_date) AS first_date, MAX(posting_date) AS last_date
+            FROM `tabExpense Claim`
+            WHERE employee = %(employee)s
+            GROUP BY YEAR(posting_date), MONTH(posting_date)
+            ORDER BY last_date DESC
+            LIMIT %(start)s, %(page_length)s""",
+            dict(
+                employee=emp_data.get("name"),
+                start=cint(start),
+                page_length=cint(page_length),
+            ),
+            as_dict=1,
+        )
+        expense_data = {}
+        if not months:
+            return gen_response(200, "Expense date get successfully", expense_data)
+
         expense_list = frappe.get_all(
             "Expense Claim",
-            filters={"employee": emp_data.get("name")},
+            filters={
+                "employee": emp_data.get("name"),
+                "posting_date": [
+                    "between",
+                    [
+                        get_first_day(months[-1].first_date),
+                        get_last_day(months[0].last_date),
+                    ],
+                ],
+            },
             fields=["*"],
+            order_by="posting_date desc",
+        )
+        attachments = get_attachment_map(
+            "Expense Claim", [expense.name for expense in expense_list]
         )
-        expense_data = {}
         for expense in expense_list:
-            (
-                expense["expense_type"],
-                expense["expense_description"],
-                expense["expense_date"],
-            ) = frappe.get_value(
-                "Expense Claim Detail",
-                {"parent": expense.name},
-                ["expense_type", "description", "expense_date"],
-            )
-            expense["expense_date"] = expense["expense_date"].strftime("%d-%m-%Y")
-            expense["posting_date"] = expense["posting_date"].strftime("%d-%m-%Y")
-            expense["total_claimed_amount"] = fmt_money(
-                expense["total_claimed_amount"],
-                currency=global_defaults.get("default_currency"),
-            )
-            expense["attachments"] = frappe.get_all(
-                "File",
-                filters={
-                    "attached_to_doctype": "Expense Claim",
-                    "attached_to_name": expense.name,
-                    "is_folder": 0,
-                },
-                fields=["file_url"],
+            expense["attachments"] = attachments.get(expense.name, [])
+            expense_data.setdefault(get_month_year_details(expense), []).append(
+                expense
             )
-
-            month_year = get_month_year_details(expense)
-            if not month_year in list(expense_data.keys())[::-1]:
-                expense_data[month_year] = [expense]
-            else:
-                expense_data[month_year].append(expense)
+        set_expense_details(expense_list)
         return gen_response(200, "Expense date get successfully", expense_data)
     except Exception as e:
         return exception_handler(e)
@@ -306,32 +308,66 @@ def get_month_year_details(expense):
 
 @frappe.whitelist()
 @ess_validate(methods=["GET"])
-def get_salary_sllip():
+def get_salary_sllip(start=0, page_length=12):
     try:
+        global_defaults = get_global_defaults()
         emp_data = get_employee_by_user(frappe.session.user)
         if not len(emp_data) >= 1:
             return gen_response(500, "Employee does not exists")
         validate_employee_data(emp_data)
+        # summary only, the full slip is loaded on demand by get_salary_slip_details
         salary_slip_list = frappe.get_all(
             "Salary Slip",
             filters={"employee": emp_data.get("name")},
-            fields=["posting_date", "name"],
+            fields=[
+                "name",
+                "posting_date",
+                "start_date",
+                "end_date",
+                "gross_pay",
+                "net_pay",
+                "currency",
+            ],
+            start=cint(start),
+            page_length=cint(page_length),
+            order_by="posting_date desc",
         )
         ss_data = []
         for ss in salary_slip_list:
-            ss_details = {}
-            month_year = get_month_year_details(ss)
-            ss_details["month_year"] = month_year
-            ss_details["salary_slip_id"] = ss.name
-            ss_details["details"] = get_salary_slip_details(ss.name)
-            ss_data.append(ss_details)
+            currency = ss.currency or global_defaults.get("default_currency")
+            ss_data.append(
+                dict(
+                    month_year=get_month_year_details(ss),
+                    salary_slip_id=ss.name,
+                    posting_date=ss.posting_date.strftime("%d-%m-%Y"),
+                    start_date=ss.start_date.strftime("%d-%m-%Y"),
+                    end_date=ss.end_date.strftime("%d-%m-%Y"),
+                    gross_pay=fmt_money(ss.gross_pay, currency=currency),
+                    net_pay=fmt_money(ss.net_pay, currency=currency),
+                )
+            )
         return gen_response(200, "Salary slip details get successfully", ss_data)
     except Exception as e:
         return exception_handler(e)
 
 
+@frappe.whitelist()
+@ess_validate(methods=["GET"])
 def get_salary_slip_details(ss_id):
-    return frappe.get_doc("Salary Slip", ss_id)
+    try:
+        emp_data = get_employee_by_user(frappe.session.user)
+        salary_slip = frappe.get_doc("Salary Slip", ss_id)
+        if not emp_data.get("name") == salary_slip.get("employee"):
+            return gen_response(
+                500, "Does not have persmission to read this salary slip"
+            )
+        return gen_response(
+            200, "Salary slip details get successfully", salary_slip.as_dict()
+        )
+    except frappe.DoesNotExistError:
+        return gen_response(500, "Invalid salary slip id")
+    except Exception as e:
+        return exception_handler(e)
 
 
 @frappe.whitelist()
@@ -344,25 +380,11 @@ def download_salary_slip(ss_id):
             return gen_response(
                 500, "Does not have persmission to read this salary slip"
             )
-        default_print_format = frappe.db.get_value(
-            "Employee Self Service Settings",
-            "Employee Self Service Settings",
-            "default_print_format",
-        )
-        if not default_print_format:
-            default_print_format = (
-                frappe.db.get_value(
-                    "Property Setter",
-                    dict(property="default_print_format", doc_type=res.doctype),
-                    "value",
-                )
-                or "Standard"
-            )
-        language = frappe.get_system_settings("language")
-        # return  frappe.utils.get_url()
-        url = f"{ frappe.utils.get_url() }/{ res.doctype }/{ res.name }?format={ default_print_format or 'Standard' }&_lang={ language }&key={ res.get_signature() }"
-        # return url
-        download_pdf(res.doctype, res.name, default_print_format, res)
+        frappe.local.response.filename = "{name}.pdf".format(
+            name=res.name.replace(" ", "-").replace("/", "-")
+        )
+        frappe.local.response.filecontent = get_salary_slip_pdf(res)
+        frappe.local.response.type = "download"
     except Exception as e:
         return exception_handler(e)
 
@@ -383,37 +405,10 @@ def download_pdf(doctype, name, format=None, doc=None, no_letterhead=0):
 @ess_validate(methods=["GET"])
 def get_dashboard():
     try:
-        emp_data = get_employee_by_user(frappe.session.user, fields=["name", "company", "image", "employee_name"])
-        notice_board = get_notice_board(emp_data.get("name"))
-        # attendance_details = get_attendance_details(emp_data)
-        log_details = get_last_log_details(emp_data.get("name"))
-        settings = get_ess_settings()
-        dashboard_data = {
-            "notice_board": notice_board,
-            "leave_balance": [],
-            "latest_leave": {},
-            "latest_expense": {},
-            "latest_salary_slip": {},
-            "stop_location_validate": settings.get("location_validate"),
-            "last_log_type": log_details.get("log_type"),
-            "version": settings.get("version") or "1.0",
-            "update_version_forcefully": settings.get("update_version_forcefully") or 1,
-            "company": emp_data.get("company") or "Employee Dashboard",
-            "last_log_time": log_details.get("time").strftime("%I:%M%p")
-            if log_details.get("time")
-            else "",
-            "check_in_with_image": settings.get("check_in_with_image"),
-            "check_in_with_location": settings.get("check_in_with_location"),
-            "quick_task": settings.get("quick_task"),
-            "allow_odometer_reading_input": settings.get(
-                "allow_odometer_reading_input"
-            ),
-        }
-        dashboard_data["employee_image"] = emp_data.get("image")
-        dashboard_data["employee_name"] = emp_data.get("employee_name")
-        get_latest_expense(dashboard_data, emp_data.get("name"))
-        get_latest_ss(dashboard_data, emp_data.get("name"))
-        get_last_log_type(dashboard_data, emp_data.get("name"))
+        emp_data = get_employee_by_user(
+            frappe.session.user, fields=["name", "company", "image", "employee_name"]
+        )
+        dashboard_data = get_dashboard_data(emp_data)
         return gen_response(200, "Dashboard data get successfully", dashboard_data)
 
     except Exception as e:
@@ -424,13 +419,7 @@ def get_dashboard():
 def get_leave_balance_dashboard():
     try:
         emp_data = get_employee_by_user(frappe.session.user, fields=["name", "company"])
-        fiscal_year = get_fiscal_year(nowdate())[0]
-        dashboard_data = {"leave_balance": []}
-        if fiscal_year:
-            res = get_leave_balance_report(
-                emp_data.get("name"), emp_data.get("company"), fiscal_year
-            )
-            dashboard_data["leave_balance"] = res["result"]
+        dashboard_data = {"leave_balance": get_leave_balances(emp_data.get("name"))}
         return gen_response(200, "Leave balance data get successfully", dashboard_data)
     except Exception as e:
         return exception_handler(e)
@@ -440,7 +429,11 @@ def get_leave_balance_dashboard():
 def get_attendance_details_dashboard():
     try:
         emp_data = get_employee_by_user(frappe.session.user, fields=["name", "company"])
-        attendance_details = get_attendance_details(emp_data)
+        attendance_details = get_cached_section(
+            emp_data.get("name"),
+            "attendance_details",
+            lambda: get_attendance_details(emp_data),
+        )
         return gen_response(
             200, "Leave balance data get successfully", attendance_details
         )
@@ -448,50 +441,6 @@ def get_attendance_details_dashboard():
         return exception_handler(e)
 
 
-def get_last_log_details(employee):
-    log_details = frappe.db.sql(
-        """SELECT log_type,
-        time
-        FROM `tabEmployee Checkin`
-        WHERE employee=%s
-        AND DATE(time)=%s
-        ORDER BY time DESC""",
-        (employee, today()),
-        as_dict=1,
-    )
-
-    if log_details:
-        return log_details[0]
-    else:
-        return {"log_type": "OUT", "time": None}
-
-
-def get_notice_board(employee=None):
-    filters = [
-        ["Notice Board Employee", "employee", "=", employee],
-        ["Notice Board", "apply_for", "=", "Specific Employees"],
-        ["Notice Board", "from_date", "<=", today()],
-        ["Notice Board", "to_date", ">=", today()],
-    ]
-    notice_board_employee = frappe.get_all(
-        "Notice Board",
-        filters=filters,
-        fields=["notice_title as title", "message"],
-    )
-    common_filters = [
-        ["Notice Board", "apply_for", "=", "All Employee"],
-        ["Notice Board", "from_date", "<=", today()],
-        ["Notice Board", "to_date", ">=", today()],
-    ]
-    notice_board_common = frappe.get_all(
-        "Notice Board",
-        filters=common_filters,
-        fields=["notice_title as title", "message"],
-    )
-    notice_board_employee.extend(notice_board_common)
-    return notice_board_employee
-
-
 def get_attendance_details(emp_data):
     last_date = get_last_day(today())
     first_date = get_first_day(today())
@@ -500,9 +449,7 @@ def get_attendance_details(emp_data):
     days_off = 0
     absent = 0
     total_present = 0
-    attendance_report = run_attendance_report(
-        emp_data.get("name"), emp_data.get("company")
-    )
+    attendance_report = get_attendance_summary(emp_data.get("name"))
     if attendance_report:
         days_off = flt(attendance_report.get("total_leaves")) + flt(
             attendance_report.get("total_holidays")
@@ -548,19 +495,10 @@ def get_attendance_details(emp_data):
 
 
 @frappe.whitelist()
-def run_attendance_report(employee, company):
-    filters = {
-        "month": cstr(frappe.utils.getdate().month),
-        "year": cstr(frappe.utils.getdate().year),
-        "company": company,
-        "employee": employee,
-        "summarized_view": 1,
-    }
-    from frappe.desk.query_report import run
-
-    attendance_report = run("Monthly Attendance Sheet", filters=filters)
-    if attendance_report.get("result"):
-        return attendance_report.get("result")[0]
+def run_attendance_report(employee, company=None):
+    if not frappe.has_permission("Employee", "read", employee):
+        raise frappe.PermissionError
+    return get_attendance_summary(employee)
 
 
 def get_latest_leave(dashboard_data, employee):
@@ -581,52 +519,6 @@ def get_latest_leave(dashboard_data, employee):
         dashboard_data["latest_leave"] = leave_applications[0]
 
 
-def get_latest_expense(dashboard_data, employee):
-    global_defaults = get_global_defaults()
-    expense_list = frappe.get_all(
-        "Expense Claim",
-        filters={"employee": employee},
-        fields=["name"],
-        order_by="modified desc",
-    )
-    if len(expense_list) >= 1:
-        expense_doc = frappe.get_doc("Expense Claim", expense_list[0].name)
-        dashboard_data["latest_expense"] = dict(
-            status=expense_doc.approval_status,
-            date=expense_doc.expenses[0].expense_date.strftime("%d-%m-%Y"),
-            expense_type=expense_doc.expenses[0].expense_type,
-            # amount=expense_doc.expenses[0].amount,
-            amount=fmt_money(
-                expense_doc.expenses[0].amount,
-                currency=global_defaults.get("default_currency"),
-            ),
-            name=expense_doc.name,
-        )
-
-
-def get_latest_ss(dashboard_data, employee):
-    global_defaults = get_global_defaults()
-    salary_slips = frappe.get_all(
-        "Salary Slip",
-        filters={"employee": employee},
-        fields=["*"],
-        order_by="modified desc",
-    )
-    if len(salary_slips) >= 1:
-        month_year = get_month_year_details(salary_slips[0])
-        dashboard_data["latest_salary_slip"] = dict(
-            name=salary_slips[0].name,
-            month_year=month_year,
-            posting_date=salary_slips[0].posting_date.strftime("%d-%m-%Y"),
-            # amount=salary_slips[0].gross_pay,
-            amount=fmt_money(
-                salary_slips[0].gross_pay,
-                currency=global_defaults.get("default_currency"),
-            ),
-            total_working_days=salary_slips[0].total_working_days,
-        )
-
-
 @frappe.whitelist()
 def create_employee_log(
     log_type, location=None, odometer_reading=None, attendance_image=None
@@ -672,18 +564,6 @@ def update_shift_last_sync(emp_data):
         )
 
 
-def get_last_log_type(dashboard_data, employee):
-    logs = frappe.get_all(
-        "Employee Checkin",
-        filters={"employee": employee},
-        fields=["log_type"],
-        order_by="time desc",
-    )
-
-    if len(logs) >= 1:
-        dashboard_data["last_log_type"] = logs[0].log_type
-
-
 def daily_notice_board_event():
     create_employee_birthday_board("birthday")
     create_employee_birthday_board("work_anniversary")
@@ -753,7 +633,6 @@ def get_employees_having_an_event_today(event_type, date=None):
 @ess_validate(methods=["GET"])
 def get_task_list(start=0, page_length=10, filters=None):
     try:
-        frappe.log_error(title="filters",message=filters)
         tasks = frappe.get_list(
             "Task",
             fields=[
@@ -774,66 +653,12 @@ def get_task_list(start=0, page_length=10, filters=None):
             page_length=page_length,
             order_by="modified desc",
         )
-        for task in tasks:
-            # if frappe.session.user == task.get("assigned_by") or frappe.session.user == task.get("completed_by") or (task.get("assigned_to") and frappe.session.user in task.get("assigned_to")):
-            if task["exp_end_date"]:
-                task["exp_end_date"] = task["exp_end_date"].strftime("%d-%m-%Y")
-            get_task_comments(task)
-            task["project_name"] = frappe.db.get_value(
-                "Project", {"name": task.get("project")}, ["project_name"]
-            )
-            get_task_assigned_by(task)
-            if task.get("assigned_to"):
-                task["assigned_to"] = frappe.get_all(
-                    "User",
-                    filters=[["User", "email", "in", json.loads(task.get("assigned_to"))]],
-                    fields=["full_name as user", "user_image"],
-                    order_by="creation asc",
-                )
-            else:
-                task["assigned_to"] = []
-                # updated_task.append(task)
+        enrich_tasks(tasks)
 
         return gen_response(200, "Task list getting Successfully", tasks)
     except Exception as e:
         return exception_handler(e)
 
-def get_task_assigned_by(task):
-    task["assigned_by"] = frappe.db.get_value(
-        "User",
-        {"name": task.get("assigned_by")},
-        ["full_name as user", "user_image"],
-        as_dict=1,
-    )
-
-
-
-def get_task_comments(task):
-    comments = frappe.get_all(
-        "Comment",
-        filters={
-            "reference_name": ["like", "%{0}%".format(task.get("name"))],
-            "comment_type": "Comment",
-        },
-        fields=[
-            "content as comment",
-            "comment_by",
-            "reference_name",
-            "creation",
-            "comment_email",
-        ],
-    )    
-    for comment in comments:
-        comment["commented"] = pretty_date(comment["creation"])
-        comment["creation"] = comment["creation"].strftime("%I:%M %p")
-        user_image = frappe.get_value(
-            "User", comment.comment_email, "user_image", cache=True
-        )
-        comment["user_image"] = user_image
-
-    task["comments"] = comments
-    task["num_comments"] = len(comments)
-
 def validate_assign_task(task_id):
     assigned_to = frappe.get_value(
         "Task",
@@ -941,12 +766,8 @@ def get_holiday_list(year=None):
 @ess_validate(methods=["GET"])
 def get_task_list_dashboard():
     try:
-        filters = [
-            ["_assign", "like", f"%{frappe.session.user}%"],
-            ["status", "!=", "Completed"],
-        ]
-        tasks = frappe.get_all(
-            "Task",
+        tasks = get_assigned_tasks(
+            frappe.session.user,
             fields=[
                 "name",
                 "subject",
@@ -958,59 +779,10 @@ def get_task_list_dashboard():
                 "_assign as assigned_to",
                 "owner as assigned_by",
             ],
-            filters=filters,
+            conditions=["task.status != 'Completed'"],
             limit=4,
         )
-        for task in tasks:
-            if task["exp_end_date"]:
-                task["exp_end_date"] = task["exp_end_date"].strftime("%d-%m-%Y")
-            comments = frappe.get_all(
-                "Comment",
-                filters={
-                    "reference_name": ["like", "%{0}%".format(task.get("name"))],
-                    "comment_type": "Comment",
-                },
-                fields=[
-                    "content as comment",
-                    "comment_by",
-                    "reference_name",
-                    "creation",
-                    "comment_email",
-                ],
-            )
-
-            project_name = frappe.db.get_value(
-                "Project", {"name": task.get("project")}, ["project_name"]
-            )
-            task["project_name"] = project_name
-
-            assigned_by = frappe.db.get_value(
-                "User",
-                {"name": task.get("assigned_by")},
-                ["full_name as user", "user_image"],
-                as_dict=1,
-            )
-            task["assigned_by"] = assigned_by
-
-            for comment in comments:
-                comment["commented"] = pretty_date(comment["creation"])
-                comment["creation"] = comment["creation"].strftime("%I:%M %p")
-                user_image = frappe.get_value(
-                    "User", comment.comment_email, "user_image", cache=True
-                )
-                comment["user_image"] = user_image
-
-            assigned_to = frappe.get_all(
-                "User",
-                filters=[["User", "email", "in", json.loads(task.get("assigned_to"))]],
-                fields=["full_name as user", "user_image"],
-                order_by="creation asc",
-            )
-
-            task["assigned_to"] = assigned_to
-
-            task["comments"] = comments
-            task["num_comments"] = len(comments)
+        enrich_tasks(tasks)
 
         return gen_response(200, "Task list get successfully", tasks)
     except Exception as e:
@@ -1024,68 +796,9 @@ def get_attendance_list(year=None, month=None):
         if not year or not month:
             return gen_response(500, "year and month is required", [])
         emp_data = get_employee_by_user(frappe.session.user)
-        present_count = 0
-        absent_count = 0
-        late_count = 0
-
-        employee_attendance_list = frappe.get_all(
-            "Attendance",
-            filters={
-                "employee": emp_data.get("name"),
-                "attendance_date": [
-                    "between",
-                    [
-                        f"{int(year)}-{int(month)}-01",
-                        f"{int(year)}-{int(month)}-{calendar.monthrange(int(year), int(month))[1]}",
-                    ],
-                ],
-            },
-            fields=[
-                "name",
-                "DATE_FORMAT(attendance_date, '%d %W') AS attendance_date",
-                "status",
-                "working_hours",
-                "in_time",
-                "out_time",
-                "late_entry",
-            ],
-        )
-
-        if not employee_attendance_list:
+        attendance_data = get_attendance_month(emp_data.get("name"), year, month)
+        if not attendance_data.get("attendance_list"):
             return gen_response(500, "no attendance found for this year and month", [])
-
-        for attendance in employee_attendance_list:
-            employee_checkin_details = frappe.get_all(
-                "Employee Checkin",
-                filters={"attendance": attendance.get("name")},
-                fields=["log_type", "time_format(time, '%h:%i%p') as time"],
-            )
-
-            attendance["employee_checkin_detail"] = employee_checkin_details
-
-            if attendance["status"] == "Present":
-                present_count += 1
-
-                if attendance["late_entry"] == 1:
-                    late_count += 1
-
-            elif attendance["status"] == "Absent":
-                absent_count += 1
-
-            del attendance["name"]
-            del attendance["status"]
-            del attendance["late_entry"]
-
-        attendance_details = {
-            "days_in_month": calendar.monthrange(int(year), int(month))[1],
-            "present": present_count,
-            "absent": absent_count,
-            "late": late_count,
-        }
-        attendance_data = {
-            "attendance_details": attendance_details,
-            "attendance_list": employee_attendance_list,
-        }
         return gen_response(
             200, "Attendance data getting successfully", attendance_data
         )
@@ -1418,31 +1131,14 @@ def upcoming_activity(date=None):
 def employee_device_info(**kwargs):
     try:
         data = kwargs
-        existing_token = frappe.db.get_value(
-            "Employee Device Info",
-            filters={"user": frappe.session.user},
-            fieldname="name",
-        )
-        if frappe.db.exists("Employee Device Info", existing_token):
-            token = frappe.get_doc("Employee Device Info", existing_token)
-            token.platform = data.get("platform")
-            token.os_version = data.get("os_version")
-            token.device_name = data.get("device_name")
-            token.app_version = data.get("app_version")
-            token.token = data.get("token")
-            token.save(ignore_permissions=True)
-        else:
-            token = frappe.get_doc(
-                dict(
-                    doctype="Employee Device Info",
-                    platform=data.get("platform"),
-                    os_version=data.get("os_version"),
-                    device_name=data.get("device_name"),
-                    app_version=data.get("app_version"),
-                    token=data.get("token"),
-                    user=frappe.session.user,
-                )
-            ).insert(ignore_permissions=True)
+        register_device(
+            user=frappe.session.user,
+            token=data.get("token"),
+            platform=data.get("platform"),
+            os_version=data.get("os_version"),
+            device_name=data.get("device_name"),
+            app_version=data.get("app_version"),
+        )
 
         return gen_response(200, "Device information saved successfully!")
     except Exception as e:
@@ -1482,18 +1178,75 @@ def notification_list():
 
         notification.extend(all_notification)
 
+        user_image = frappe.get_value("User", frappe.session.user, "user_image")
         for notified in notification:
             notified["creation"] = pretty_date(notified.get("creation"))
-            notified["user_image"] = frappe.get_value(
-                "User", frappe.session.user, "user_image"
-            )
+            notified["user_image"] = user_image
         return gen_response(200, "Notification list get successfully", notification)
     except Exception as e:
         return exception_handler(e)
 
 
+@frappe.whitelist()
+@ess_validate(methods=["GET"])
+def get_notification_inbox(cursor=None, page_length=20):
+    try:
+        inbox = get_inbox(frappe.session.user, cursor=cursor, page_length=page_length)
+        inbox["unread"] = get_unread_count(frappe.session.user)
+        return gen_response(200, "Notification list get successfully", inbox)
+    except Exception as e:
+        return exception_handler(e)
+
+
+@frappe.whitelist()
+@ess_validate(methods=["GET"])
+def get_unread_notification_count():
+    try:
+        return gen_response(
+            200,
+            "Unread notification count get successfully",
+            get_unread_count(frappe.session.user),
+        )
+    except Exception as e:
+        return exception_handler(e)
+
+
+@frappe.whitelist()
+@ess_validate(methods=["POST"])
+def mark_notifications_read():
+    try:
+        mark_all_read(frappe.session.user)
+        return gen_response(200, "Notifications marked as read")
+    except Exception as e:
+        return exception_handler(e)
+
+
 def send_notification_on_event():
     birthday_events = get_employees_having_an_event_today("birthday", date=today())
+    anniversary_events = get_employees_having_an_event_today(
+        "work_anniversary", date=today()
+    )
+    if get_ess_settings().get("event_notification_digest") and (
+        len(birthday_events) + len(anniversary_events) > 1
+    ):
+        # one broadcast for the whole day instead of one per employee
+        message = []
+        if birthday_events:
+            message.append(
+                f"Wish happy birthday to {get_digest_names(birthday_events)}."
+            )
+        if anniversary_events:
+            message.append(
+                f"Wish work anniversary {get_digest_names(anniversary_events)}."
+            )
+        create_push_notification(
+            title="Today's Birthdays & Work Anniversaries",
+            message=" ".join(message),
+            send_for="All User",
+            notification_type="event",
+        )
+        return
+
     for event in birthday_events:
         create_push_notification(
             title=f"{event.get('name')}'s Birthday",
@@ -1502,9 +1255,6 @@ def send_notification_on_event():
             notification_type="event",
         )
 
-    anniversary_events = get_employees_having_an_event_today(
-        "work_anniversary", date=today()
-    )
     for anniversary in anniversary_events:
         create_push_notification(
             title=f"{anniversary.get('name')}' s Work Anniversary",
@@ -1514,36 +1264,79 @@ def send_notification_on_event():
         )
 
 
+def get_digest_names(events, limit=10):
+    names = [event.get("name") for event in events]
+    if len(names) > limit:
+        return f"{', '.join(names[:limit])} and {len(names) - limit} others"
+    if len(names) > 1:
+        return f"{', '.join(names[:-1])} and {names[-1]}"
+    return names[0]
+
+
 def global_holiday_list(date=None):
-    global_company = frappe.db.get_single_value("Global Defaults", "default_company")
-    employee_holiday_list = frappe.get_all(
-        "Employee",
-        {"company": global_company, "holiday_list": ("!=", "")},
-        ["employee", "holiday_list", "user_id"],
+    """
+    Holidays falling on `date` for every active employee of every company,
+    taken from the employee holiday list or else the company default one.
+    Starts from the few Holiday rows of the day, so the number of queries
+    does not grow with the headcount.
+    """
+    return frappe.db.sql(
+        """SELECT 'holiday' AS title,
+        h.description,
+        e.user_id,
+        h.parent AS holiday_list
+        FROM `tabHoliday` h
+        INNER JOIN `tabEmployee` e ON e.holiday_list = h.parent
+        WHERE h.holiday_date = %(date)s
+        AND h.parenttype = 'Holiday List'
+        AND e.status = 'Active'
+        UNION ALL
+        SELECT 'holiday' AS title,
+        h.description,
+        e.user_id,
+        h.parent AS holiday_list
+        FROM `tabHoliday` h
+        INNER JOIN `tabCompany` c ON c.default_holiday_list = h.parent
+        INNER JOIN `tabEmployee` e ON e.company = c.name
+        WHERE h.holiday_date = %(date)s
+        AND h.parenttype = 'Holiday List'
+        AND e.status = 'Active'
+        AND IFNULL(e.holiday_list, '') = ''""",
+        dict(date=getdate(date)),
+        as_dict=1,
     )
-    holidays = []
-    for employee in employee_holiday_list:
-        filters = [
-            ["Holiday", "holiday_date", "=", getdate(date)],
-            ["Holiday", "parent", "=", employee.holiday_list],
-        ]
-        holidays_list = frappe.get_all(
-            "Holiday", filters=filters, fields=["'holiday' as title", "description"]
-        )
-        for holiday in holidays_list:
-            holiday["user_id"] = employee.user_id
-            holidays.append(holiday)
-    return holidays
 
 
 def on_holiday_event():
     holiday_list = global_holiday_list(date=today())
+    if not get_ess_settings().get("event_notification_digest"):
+        for holiday in holiday_list:
+            create_push_notification(
+                title=f"{holiday.get('title')}",
+                message=f"{holiday.get('description')}",
+                send_for="Single User",
+                user=holiday.get("user_id"),
+                notification_type="Holiday",
+            )
+        return
+
+    # one multicast per holiday list instead of one push per employee
+    holiday_users = {}
     for holiday in holiday_list:
+        if not holiday.get("user_id"):
+            continue
+        key = (
+            holiday.get("holiday_list"),
+            holiday.get("title"),
+            holiday.get("description"),
+        )
+        holiday_users.setdefault(key, []).append(holiday.get("user_id"))
+    for (_holiday_list, title, description), users in holiday_users.items():
         create_push_notification(
-            title=f"{holiday.get('title')}",
-            message=f"{holiday.get('description')}",
-            send_for="Single User",
-            user=holiday.get("user_id"),
+            title=f"{title}",
+            message=f"{description}",
+            send_for="Multiple User",
+            users=users,
             notification_type="Holiday",
         )
 
@@ -1690,31 +1483,11 @@ def get_task_by_id(task_id=None):
                 order_by="creation asc",
             )
 
-        comments = frappe.get_all(
-            "Comment",
-            filters={
-                "reference_name": ["like", "%{0}%".format(tasks.get("name"))],
-                "comment_type": "Comment",
-            },
-            fields=[
-                "content as comment",
-                "comment_by",
-                "reference_name",
-                "creation",
-                "comment_email",
-            ],
+        tasks["comments"] = get_task_comments(tasks.get("name"))
+        tasks["num_comments"] = get_comment_count_map([tasks.get("name")]).get(
+            tasks.get("name"), 0
         )
 
-        for comment in comments:
-            comment["commented"] = pretty_date(comment["creation"])
-            comment["creation"] = comment["creation"].strftime("%I:%M %p")
-            comment["user_image"] = frappe.get_value(
-                "User", comment.comment_email, "user_image", cache=True
-            )
-
-        tasks["comments"] = comments
-        tasks["num_comments"] = len(comments)
-
         return gen_response(200, "Task", tasks)
     except frappe.PermissionError:
         return gen_response(500, "Not permitted read task")
@@ -1722,6 +1495,22 @@ def get_task_by_id(task_id=None):
         return exception_handler(e)
 
 
+@frappe.whitelist()
+@ess_validate(methods=["GET"])
+def get_task_comment_list(task_id=None, start=0, page_length=20):
+    try:
+        if not task_id:
+            return gen_response(500, "task_id is required", [])
+        if not frappe.has_permission("Task", "read", task_id):
+            return gen_response(500, "Not permitted read task")
+        comments = get_task_comments(
+            task_id, start=cint(start), page_length=cint(page_length)
+        )
+        return gen_response(200, "Comments get successfully", comments)
+    except Exception as e:
+        return exception_handler(e)
+
+
 @frappe.whitelist()
 @ess_validate(methods=["POST"])
 def apply_expense():
@@ -2093,13 +1882,11 @@ def update_task(**kwargs):
 @ess_validate(methods=["GET"])
 def get_quick_task_list():
     try:
-        tasks = frappe.get_all(
-            "Task",
+        tasks = get_assigned_tasks(
+            frappe.session.user,
             fields=["name", "subject", "exp_end_date", "status"],
-            filters={
-                "_assign": ["like", f"%{frappe.session.user}%"],
-                "exp_end_date": ["=", today()],
-            },
+            conditions=["task.exp_end_date = %(today)s"],
+            values={"today": today()},
         )
         return gen_response(200, "Task list getting Successfully", tasks)
     except Exception as e:
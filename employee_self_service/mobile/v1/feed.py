@@ -1,14 +1,19 @@
 import frappe
-import json
 from frappe import _
-from frappe.utils import pretty_date, getdate
+from frappe.utils import pretty_date, getdate, sbool
 from frappe.utils.data import now_datetime
 from employee_self_service.mobile.v1.api_utils import (
     gen_response,
     ess_validate,
     exception_handler,
     get_employee_by_user,
-    remove_default_fields,
+)
+from employee_self_service.mobile.v1.feed_utils import get_feed_page
+from employee_self_service.employee_self_service.doctype.ess_post_like.ess_post_like import (
+    toggle_post_like,
+)
+from employee_self_service.employee_self_service.doctype.ess_post.ess_post import (
+    record_poll_vote,
 )
 
 
@@ -32,51 +37,10 @@ def ess_post(**data):
 
 
 def get_ess_post(post_name):
-    post_details = json.loads(frappe.get_doc("ESS Post", post_name).as_json())
-    post_details = remove_default_fields(post_details)
-    # post_details["comments"] = get_comments(
-    #     post.get("name"), limit=2, internal=True
-    # )
-    post_details["comments_count"] = frappe.db.count(
-        "Comment",
-        {
-            "reference_doctype": "ESS Post",
-            "reference_name": post_name,
-            "comment_type": "Comment",
-        },
-    )
-    if post_details.get("_liked_by"):
-        post_details["likes_count"] = len(json.loads(post_details["_liked_by"]))
-        likes_list = json.loads(post_details["_liked_by"])
-        if frappe.session.user in likes_list:
-            post_details["liked_by_me"] = True
-        else:
-            post_details["liked_by_me"] = False
-
-        post_details["_liked_by"] = frappe.get_all(
-            "User",
-            filters=[["name", "in", likes_list]],
-            fields=["name", "full_name", "user_image"],
-        )
-
-    else:
-        post_details["likes_count"] = 0
-        post_details["liked_by_me"] = False
-    if post_details.get("post_type") == "Poll":
-        post_details["my_vote"] = frappe.db.get_value(
-            "ESS Post Poll Log",
-            {"user": frappe.session.user, "parent": post_details.get("name")},
-            "answer",
-        )
-        post_details["total_vote"] = len(post_details.get("ess_post_poll_log"))
-        
-    if frappe.session.user != post_details.get('user'):
-        del post_details["ess_post_poll_log"]
-    else:
-        for poll_log in post_details["ess_post_poll_log"]:
-            remove_default_fields(poll_log)
-        
-    return post_details
+    posts = get_feed_page([["name", "=", post_name]], page_length=1)
+    if not posts:
+        frappe.throw(_("ESS Post {0} not found").format(post_name), frappe.DoesNotExistError)
+    return posts[0]
 
 
 @frappe.whitelist()
@@ -88,18 +52,7 @@ def get_feed(my_post=False, start=0, page_length=10):
             filters.append(["user", "=", frappe.session.user])
         else:
             filters.append(["publish", "=", 1])
-        posts = frappe.get_all(
-            "ESS Post",
-            filters=filters,
-            fields=["name"],
-            start=start,
-            page_length=page_length,
-            order_by="post_datetime desc",
-        )
-        feed_details = []
-        for post in posts:
-            post_details = get_ess_post(post_name=post.name)
-            feed_details.append(post_details)
+        feed_details = get_feed_page(filters, start=start, page_length=page_length)
         return gen_response(200, "post details get successfully", feed_details)
     except Exception as e:
         return exception_handler(e)
@@ -188,14 +141,9 @@ def get_comments(post_id=None, start=0, page_length=10, limit=20, internal=False
 @ess_validate(methods=["POST"])
 def post_like_toggle(post_id, like=False):
     try:
-        from frappe.desk.like import toggle_like
-
-        if like:
-            toggle_like(doctype="ESS Post", name=post_id, add="Yes")
-        else:
-            toggle_like(doctype="ESS Post", name=post_id, add="No")
-
-        count = len(json.loads(frappe.db.get_value("ESS Post", post_id, "_liked_by")))
+        if not frappe.db.exists("ESS Post", post_id):
+            return gen_response(500, "Invalid Post")
+        toggle_post_like(post_id, frappe.session.user, sbool(like))
         post_data = get_ess_post(post_name=post_id)
         return gen_response(200, "Like updated", post_data)
     except Exception as e:
@@ -208,21 +156,12 @@ def poll_user_answer(post_id, answer):
     try:
         if frappe.get_value("ESS Post", post_id, "poll_end_date") < getdate():
             return gen_response("403", "Poll is ended")
-        poll_answer = frappe.db.get_value(
-            "ESS Post Poll Log",
-            {"user": frappe.session.user, "parent": post_id},
-            "name",
-        )
-        if poll_answer:
-            frappe.db.set_value("ESS Post Poll Log", poll_answer, "answer", answer)
-            post_doc = frappe.get_doc("ESS Post", post_id)
-            post_doc.save(ignore_permissions=True)
-        else:
-            post_doc = frappe.get_doc("ESS Post", post_id)
-            post_doc.append(
-                "ess_post_poll_log", dict(user=frappe.session.user, answer=answer)
-            )
-            post_doc.save(ignore_permissions=True)
+        if not frappe.db.exists(
+            "ESS Post Poll Options",
+            {"parent": post_id, "parenttype": "ESS Post", "option": answer},
+        ):
+            return gen_response(500, "Invalid poll answer")
+        record_poll_vote(post_id, frappe.session.user, answer)
         post_data = get_ess_post(post_name=post_id)
         return gen_response(200, "Poll answer added", post_data)
     except Exception as e:
@@ -0,0 +1,108 @@
+import frappe
+from employee_self_service.mobile.v1.api_utils import remove_default_fields
+
+POST_TABLES = {
+    "ess_post_attachment": "ESS Post Attachment",
+    "ess_post_poll_options": "ESS Post Poll Options",
+}
+
+
+def get_feed_page(filters, start=0, page_length=10, order_by="post_datetime desc"):
+    """
+    Posts matching `filters` in the shape of get_ess_post, built for the
+    whole page with a fixed number of bulk queries whatever its length.
+    """
+    posts = frappe.get_all(
+        "ESS Post",
+        filters=filters,
+        fields=["*"],
+        start=start,
+        page_length=page_length,
+        order_by=order_by,
+    )
+    if not posts:
+        return posts
+
+    names = [post.name for post in posts]
+    poll_names = [post.name for post in posts if post.post_type == "Poll"]
+    user = frappe.session.user
+    child_rows = {
+        fieldname: get_child_rows(child_doctype, names)
+        for fieldname, child_doctype in POST_TABLES.items()
+    }
+    my_votes = get_my_vote_map(poll_names, user)
+    poll_logs = get_child_rows(
+        "ESS Post Poll Log", [post.name for post in posts if post.user == user]
+    )
+    likers = get_liker_map(names)
+
+    for post in posts:
+        for fieldname in POST_TABLES:
+            post[fieldname] = child_rows[fieldname].get(post.name, [])
+        # counters kept by ess_post_like, no json parsing or counting here
+        post["comments_count"] = post.comment_count or 0
+        post["likes_count"] = post.like_count or 0
+        post["_liked_by"] = likers.get(post.name, [])
+        post["liked_by_me"] = any(liker.name == user for liker in post["_liked_by"])
+        if post.post_type == "Poll":
+            post["my_vote"] = my_votes.get(post.name)
+            set_poll_percentages(post)
+        if post.user == user:
+            post["ess_post_poll_log"] = [
+                remove_default_fields(poll_log)
+                for poll_log in poll_logs.get(post.name, [])
+            ]
+        remove_default_fields(post)
+    return posts
+
+
+def get_child_rows(child_doctype, parents):
+    rows = {}
+    if not parents:
+        return rows
+    for row in frappe.get_all(
+        child_doctype,
+        filters={"parent": ["in", parents], "parenttype": "ESS Post"},
+        fields=["*"],
+        order_by="idx asc",
+    ):
+        rows.setdefault(row.parent, []).append(row)
+    return rows
+
+
+def get_my_vote_map(polls, user):
+    if not polls:
+        return {}
+    return dict(
+        frappe.get_all(
+            "ESS Post Poll Log",
+            filters={"parent": ["in", polls], "parenttype": "ESS Post", "user": user},
+            fields=["parent", "answer"],
+            as_list=1,
+        )
+    )
+
+
+def set_poll_percentages(post):
+    # tallies are kept by record_poll_vote, percentages are derived here
+    total_vote = sum(option.num_of_vote or 0 for option in post.ess_post_poll_options)
+    post["total_vote"] = total_vote
+    for option in post.ess_post_poll_options:
+        option["percentage"] = (
+            100 * (option.num_of_vote or 0) / total_vote if total_vote else 0
+        )
+
+
+def get_liker_map(posts):
+    likers = {}
+    for liker in frappe.db.sql(
+        """SELECT post_like.post, user.name, user.full_name, user.user_image
+        FROM `tabESS Post Like` post_like
+        INNER JOIN `tabUser` user ON user.name = post_like.user
+        WHERE post_like.post IN %(posts)s
+        ORDER BY post_like.creation""",
+        dict(posts=posts),
+        as_dict=1,
+    ):
+        likers.setdefault(liker.pop("post"), []).append(liker)
+    return likers
@@ -0,0 +1,67 @@
+import frappe
+from frappe.utils import getdate, today, flt
+from employee_self_service.mobile.v1.api_utils import clear_cache_after_commit
+
+LEAVE_BALANCE_CACHE_KEY = "ess_leave_balance"
+
+
+def get_leave_balances(employee, date=None):
+    """
+    Leave balance of `employee` per leave type on `date`, over the whole
+    allocation period like get_leave_balance_on with
+    consider_all_leaves_in_the_allocation_period. Today's balances are cached
+    until a Leave Application or Leave Allocation of the employee changes.
+    """
+    if date and getdate(date) != getdate(today()):
+        return build_leave_balances(employee, date)
+
+    cache = frappe.cache().hget(LEAVE_BALANCE_CACHE_KEY, employee)
+    if cache and cache.get("date") == today():
+        return cache.get("balance")
+    balance = build_leave_balances(employee, today())
+    frappe.cache().hset(
+        LEAVE_BALANCE_CACHE_KEY, employee, {"date": today(), "balance": balance}
+    )
+    return balance
+
+
+def build_leave_balances(employee, date):
+    # one pass over the ledger entries of the allocations active on `date`
+    rows = frappe.db.sql(
+        """SELECT allocation.leave_type,
+            SUM(CASE WHEN ledger.transaction_type = 'Leave Allocation' AND ledger.is_expired = 0
+                THEN ledger.leaves ELSE 0 END) AS leaves_allocated,
+            -SUM(CASE WHEN ledger.is_expired = 1 THEN ledger.leaves ELSE 0 END) AS leaves_expired,
+            -SUM(CASE WHEN ledger.transaction_type = 'Leave Application'
+                THEN ledger.leaves ELSE 0 END) AS leaves_taken,
+            SUM(ledger.leaves) AS closing_balance
+        FROM `tabLeave Allocation` allocation
+        INNER JOIN `tabLeave Ledger Entry` ledger
+            ON ledger.employee = allocation.employee
+            AND ledger.leave_type = allocation.leave_type
+            AND ledger.from_date BETWEEN allocation.from_date AND allocation.to_date
+            AND ledger.docstatus = 1
+        WHERE allocation.employee = %(employee)s
+        AND allocation.docstatus = 1
+        AND %(date)s BETWEEN allocation.from_date AND allocation.to_date
+        GROUP BY allocation.leave_type
+        ORDER BY allocation.leave_type""",
+        dict(employee=employee, date=getdate(date)),
+        as_dict=1,
+    )
+    for row in rows:
+        for field in ("leaves_allocated", "leaves_expired", "leaves_taken", "closing_balance"):
+            row[field] = flt(row[field])
+        row["opening_balance"] = row["leaves_allocated"]
+    return rows
+
+
+def get_leave_balance_map(employee, date=None):
+    return {
+        row.get("leave_type"): row.get("closing_balance")
+        for row in get_leave_balances(employee, date)
+    }
+
+
+def clear_leave_balance_cache(doc, method=None):
+    clear_cache_after_commit(LEAVE_BALANCE_CACHE_KEY, [doc.employee])
@@ -1,4 +1,4 @@
 from .leave_application import my_team_leave_application
 from .expense_claim import my_team_expense_claim
-from .manager_utils import get_status_list,update_document_status
+from .manager_utils import get_status_list,update_document_status,get_team_approvals
 from employee_self_service.mobile.v1.api_utils import update_workflow_state
\ No newline at end of file
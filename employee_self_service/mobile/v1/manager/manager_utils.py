@@ -7,33 +7,150 @@ from employee_self_service.mobile.v1.api_utils import (
     exception_handler,
     get_employee_by_user,
     remove_default_fields,
-    get_global_defaults
+    get_global_defaults,
+    get_attachment_map,
+    set_expense_details,
 )
+from frappe.utils import cint
 
+TEAM_APPROVAL_FIELDS = {
+    "Leave Application": [
+        "name",
+        "leave_type",
+        "DATE_FORMAT(from_date, '%d-%m-%Y') as from_date",
+        "DATE_FORMAT(to_date, '%d-%m-%Y') as to_date",
+        "total_leave_days",
+        "description",
+        "status",
+        "DATE_FORMAT(posting_date, '%d-%m-%Y') as posting_date",
+        "employee_name",
+        "employee",
+    ],
+    "Expense Claim": [
+        "name",
+        "employee",
+        "employee_name",
+        "posting_date",
+        "total_claimed_amount",
+        "total_sanctioned_amount",
+        "approval_status",
+        "status",
+        "remark",
+    ],
+}
 
-def get_action(doctype,docname,status,row):
-    res = _check_workflow(doctype)
-    if res:
-        from frappe.model.workflow import get_transitions
-        row["workflow"] = res
-        doc = frappe.get_doc(doctype,docname)
-        transitions = get_transitions(doc)
-        actions = []
-        for row in transitions:
-            actions.append(row.get("action"))
-        return actions
-    else:
-        if not status in ["Approved","Rejected"]:
-            return ["Approved","Rejected"]
-        else:
-            return []
 
-def _check_workflow(doctype):
-        workflow = frappe.get_all("Workflow",filters={"document_type":doctype,"is_active":1},fields=["name"])
+def get_workflow(doctype):
+    from frappe.model.workflow import get_workflow_name
+
+    workflow_name = get_workflow_name(doctype)
+    return frappe.get_cached_doc("Workflow", workflow_name) if workflow_name else None
+
+
+def get_bulk_actions(doctype, rows, workflow=None):
+    """
+    Actions of the session user on each row, like get_transitions but with
+    the workflow loaded once. A document is only loaded for transitions
+    that have a condition.
+    """
+    from frappe.model.workflow import is_transition_condition_satisfied
+
+    if not workflow:
+        status_field = get_status_field(doctype)
+        return {
+            row.name: [] if row.get(status_field) in ["Approved", "Rejected"] else ["Approved", "Rejected"]
+            for row in rows
+        }
+
+    user = frappe.session.user
+    roles = set(frappe.get_roles())
+    initial_state = workflow.states[0].state if workflow.states else None
+    actions = {}
+    for row in rows:
+        actions[row.name] = []
+        if row.docstatus == 2:
+            continue
+        state = row.get(workflow.workflow_state_field) or initial_state
+        doc = None
+        for transition in workflow.transitions:
+            if transition.state != state or transition.allowed not in roles:
+                continue
+            if not (
+                user == "Administrator"
+                or transition.allow_self_approval
+                or user != row.owner
+            ):
+                continue
+            if transition.condition:
+                doc = doc or frappe.get_doc(doctype, row.name)
+                if not is_transition_condition_satisfied(transition, doc):
+                    continue
+            actions[row.name].append(transition.action)
+    return actions
+
+
+def get_team_approval_list(doctype, employee, start=0, page_length=None, fields=None):
+    """
+    Documents of the other employees visible to the session user with
+    their department, image, attachments and actions resolved in bulk.
+    """
+    workflow = get_workflow(doctype)
+    fields = list(fields or TEAM_APPROVAL_FIELDS[doctype])
+    if "*" not in fields:
+        fields += ["employee", "owner", "docstatus"]
         if workflow:
-            return True
-        else:
-            return False
+            fields.append(workflow.workflow_state_field)
+    rows = frappe.get_list(
+        doctype,
+        filters=[["employee", "!=", employee]],
+        fields=list(dict.fromkeys(fields)),
+        start=cint(start),
+        page_length=cint(page_length),
+        # the table column, posting_date may be aliased to a formatted string
+        order_by=f"`tab{doctype}`.posting_date desc",
+    )
+    names = [row.name for row in rows]
+    employees = {}
+    if rows:
+        employees = {
+            row.name: row
+            for row in frappe.get_all(
+                "Employee",
+                filters={"name": ["in", list({row.employee for row in rows})]},
+                fields=["name", "department", "image"],
+            )
+        }
+    attachments = get_attachment_map(doctype, names)
+    actions = get_bulk_actions(doctype, rows, workflow)
+    for row in rows:
+        employee_data = employees.get(row.employee) or {}
+        row["department"] = employee_data.get("department")
+        row["user_image"] = employee_data.get("image")
+        row["attachments"] = attachments.get(row.name, [])
+        row["workflow"] = bool(workflow)
+        row["action"] = actions.get(row.name)
+    if doctype == "Expense Claim":
+        set_expense_details(rows)
+    return rows
+
+
+@frappe.whitelist()
+@ess_validate(methods=["GET"])
+def get_team_approvals(doctype, start=0, page_length=20):
+    try:
+        if doctype not in TEAM_APPROVAL_FIELDS:
+            return gen_response(500, f"Approvals are not available for {doctype}")
+        emp_data = get_employee_by_user(frappe.session.user)
+        if not len(emp_data) >= 1:
+            return gen_response(500, "Employee does not exists")
+        approvals = get_team_approval_list(
+            doctype, emp_data.get("name"), start=start, page_length=page_length
+        )
+        return gen_response(200, "Team approvals get successfully", approvals)
+    except frappe.PermissionError:
+        return gen_response(500, f"Not permitted for read {doctype}")
+    except Exception as e:
+        return exception_handler(e)
 
 
 @frappe.whitelist()
@@ -82,7 +199,7 @@ def update_document_status(doctype,doc_name,status):
         return exception_handler(e)
 
 def get_status_field(doctype):
-    staus_field = "status"
+    status_field = "status"
     status_field_map = {
         "Expense Claim":"approval_status"
     }
@@ -0,0 +1,119 @@
+import frappe
+from frappe.utils import cint, pretty_date
+
+UNREAD_CACHE_KEY = "ess_unread_notifications"
+# suffix of the UNREAD_CACHE_KEY counter of "All User" notifications ever sent
+ALL_USER_COUNT = "__all_user__"
+
+
+def get_inbox(user, cursor=None, page_length=20):
+    """
+    Push Notifications of `user` (single, multiple and all user) newest
+    first. Each branch walks its own index and is limited before the merge,
+    `cursor` is the (creation, name) of the last row of the previous page.
+    """
+    cursor = frappe.parse_json(cursor) if cursor else None
+    keyset = ""
+    values = dict(user=user, page_length=cint(page_length) or 20)
+    if cursor:
+        keyset = """AND (pn.creation < %(creation)s
+            OR (pn.creation = %(creation)s AND pn.name < %(name)s))"""
+        values.update(creation=cursor.get("creation"), name=cursor.get("name"))
+
+    branch = """(SELECT pn.name, pn.title, pn.message, pn.notification_type, pn.creation
+        FROM `tabPush Notification` pn
+        {join}
+        WHERE {condition}
+        {keyset}
+        ORDER BY pn.creation DESC, pn.name DESC
+        LIMIT %(page_length)s)"""
+    notifications = frappe.db.sql(
+        """SELECT * FROM ({single} UNION ALL {multiple} UNION ALL {all_user}) inbox
+        ORDER BY creation DESC, name DESC
+        LIMIT %(page_length)s""".format(
+            single=branch.format(
+                join="",
+                condition="pn.send_for = 'Single User' AND pn.user = %(user)s",
+                keyset=keyset,
+            ),
+            multiple=branch.format(
+                join="""INNER JOIN `tabNotification User` nu
+                    ON nu.parent = pn.name AND nu.parenttype = 'Push Notification'""",
+                condition="pn.send_for = 'Multiple User' AND nu.user = %(user)s",
+                keyset=keyset,
+            ),
+            all_user=branch.format(
+                join="", condition="pn.send_for = 'All User'", keyset=keyset
+            ),
+        ),
+        values,
+        as_dict=1,
+    )
+
+    next_cursor = None
+    if len(notifications) == values["page_length"]:
+        next_cursor = dict(
+            creation=str(notifications[-1].creation), name=notifications[-1].name
+        )
+    user_image = frappe.db.get_value("User", user, "user_image")
+    for notification in notifications:
+        notification["creation"] = pretty_date(notification.get("creation"))
+        notification["user_image"] = user_image
+    return dict(notifications=notifications, next_cursor=next_cursor)
+
+
+def get_unread_count(user):
+    cache = frappe.cache()
+    count, seen, all_user_count = cache.mget(
+        [*get_unread_keys(user), get_all_user_key()]
+    )
+    if seen is None:
+        # start counting from now, "All User" notifications included
+        mark_all_read(user)
+        return 0
+    return cint(count) + cint(all_user_count) - cint(seen)
+
+
+def mark_all_read(user):
+    cache = frappe.cache()
+    count_key, seen_key = get_unread_keys(user)
+    cache.mset({count_key: 0, seen_key: cint(cache.get(get_all_user_key()))})
+
+
+def get_unread_keys(user):
+    # plain redis counters, not the pickled values of frappe.cache().hset,
+    # so they can be incremented atomically
+    cache = frappe.cache()
+    return (
+        cache.make_key(f"{UNREAD_CACHE_KEY}:count:{user}"),
+        cache.make_key(f"{UNREAD_CACHE_KEY}:seen:{user}"),
+    )
+
+
+def get_all_user_key():
+    return frappe.cache().make_key(f"{UNREAD_CACHE_KEY}:{ALL_USER_COUNT}")
+
+
+def update_unread_count(doc, method=None):
+    """Count a new Push Notification as unread for its recipients."""
+    if doc.send_for == "All User":
+        users = None
+    else:
+        users = [doc.user] if doc.send_for == "Single User" else [row.user for row in doc.users]
+        users = set(filter(None, users))
+    # after the commit, a rolled back notification is never counted
+    frappe.db.after_commit.add(lambda: increment_unread_count(users))
+
+
+def increment_unread_count(users=None):
+    cache = frappe.cache()
+    if users is None:
+        # one counter for everyone, compared to what each user has seen
+        cache.incr(get_all_user_key())
+        return
+
+    for user in users:
+        count_key, seen_key = get_unread_keys(user)
+        # a user who never read starts from the current "All User" count
+        cache.set(seen_key, cint(cache.get(get_all_user_key())), nx=True)
+        cache.incr(count_key)
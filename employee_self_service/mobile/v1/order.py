@@ -1,7 +1,7 @@
 import json
 import frappe
 from frappe import _
-from frappe.utils import cstr, fmt_money
+from frappe.utils import cstr, fmt_money, cint
 
 from erpnext.accounts.utils import getdate
 from employee_self_service.mobile.v1.api_utils import (
@@ -13,9 +13,12 @@ from employee_self_service.mobile.v1.api_utils import (
     exception_handler,
     get_actions,
     check_workflow_exists,
+    clear_cache_after_commit,
 )
 from erpnext.accounts.party import get_dashboard_info
 
+ITEM_PRICE_CACHE_KEY = "ess_item_price_snapshot"
+
 """order list api for mobile app"""
 
 
@@ -189,11 +192,22 @@ def get_customer_list(start=0, page_length=10, filters=None):
 
 @frappe.whitelist()
 @ess_validate(methods=["GET"])
-def get_item_list():
+def get_item_list(start=0, page_length=20, search=None):
     try:
+        or_filters = None
+        if search:
+            or_filters = [
+                ["item_code", "like", f"%{search}%"],
+                ["item_name", "like", f"%{search}%"],
+            ]
         item_list = frappe.get_list(
             "Item",
             fields=["name", "item_name", "item_code", "image"],
+            filters={"disabled": 0},
+            or_filters=or_filters,
+            start=cint(start),
+            page_length=cint(page_length),
+            order_by="item_name asc",
         )
         items = get_items_rate(item_list)
         gen_response(200, "Item list get successfully", items)
@@ -204,25 +218,111 @@ def get_item_list():
 
 
 def get_items_rate(items):
+    """Set rate and rate_currency on a page of items with one Item Price query."""
     global_defaults = get_global_defaults()
-    ess_settings = get_ess_settings()
-    price_list = ess_settings.get("default_price_list")
-    if not price_list:
-        frappe.throw(_("Please set price list in ess settings."))
-    for item in items:
-        item_price = frappe.get_all(
+    price_list = get_price_list()
+    prices = {}
+    if items:
+        for item_price in frappe.get_all(
             "Item Price",
-            filters={"item_code": item.name, "price_list": price_list},
-            fields=["price_list_rate"],
-        )
+            filters={
+                "item_code": ["in", [item.name for item in items]],
+                "price_list": price_list,
+            },
+            fields=["item_code", "price_list_rate"],
+            order_by="valid_from desc",
+        ):
+            prices.setdefault(item_price.item_code, item_price.price_list_rate)
+    for item in items:
+        item["rate"] = prices.get(item.name) or 0.0
         item["rate_currency"] = fmt_money(
-            item_price[0].price_list_rate if item_price else 0.0,
+            item["rate"],
             currency=global_defaults.get("default_currency"),
         )
-        item["rate"] = item_price[0].price_list_rate if item_price else 0.0
     return items
 
 
+def get_price_list():
+    price_list = get_ess_settings().get("default_price_list")
+    if not price_list:
+        frappe.throw(_("Please set price list in ess settings."))
+    return price_list
+
+
+@frappe.whitelist()
+@ess_validate(methods=["GET"])
+def get_item_price_snapshot(since=None):
+    """
+    Prices of the default price list for the app's local store. Without
+    `since` the full snapshot is returned (served from redis), with the
+    `watermark` of a previous call only the prices changed or deleted since.
+    """
+    try:
+        # the snapshot is shared by every user, so it is built without user
+        # permissions and only served to those who can read item prices
+        if not frappe.has_permission("Item Price", "read"):
+            raise frappe.PermissionError
+        price_list = get_price_list()
+        if not since:
+            snapshot = frappe.cache().hget(ITEM_PRICE_CACHE_KEY, price_list)
+            if not snapshot:
+                snapshot = get_item_price_changes(price_list)
+                frappe.cache().hset(ITEM_PRICE_CACHE_KEY, price_list, snapshot)
+        else:
+            snapshot = get_item_price_changes(price_list, since=since)
+        gen_response(200, "Item price snapshot get successfully", snapshot)
+    except frappe.PermissionError:
+        return gen_response(500, "Not permitted for item price")
+    except Exception as e:
+        return exception_handler(e)
+
+
+def get_item_price_changes(price_list, since=None):
+    filters = {"price_list": price_list}
+    if since:
+        filters["modified"] = [">", since]
+    item_prices = frappe.get_all(
+        "Item Price",
+        filters=filters,
+        fields=["item_code", "price_list_rate as rate", "modified"],
+        order_by="valid_from asc",
+    )
+    prices = {}
+    watermark = since
+    for item_price in item_prices:
+        prices[item_price.item_code] = item_price.rate
+        if not watermark or str(item_price.modified) > str(watermark):
+            watermark = str(item_price.modified)
+
+    deleted = []
+    if since:
+        for row in frappe.get_all(
+            "Deleted Document",
+            filters={"deleted_doctype": "Item Price", "creation": [">", since]},
+            fields=["data", "creation"],
+        ):
+            data = json.loads(row.data)
+            if data.get("price_list") == price_list and data.get("item_code") not in prices:
+                deleted.append(data.get("item_code"))
+            if str(row.creation) > str(watermark):
+                watermark = str(row.creation)
+
+    return {
+        "price_list": price_list,
+        "watermark": watermark,
+        "prices": prices,
+        "deleted": deleted,
+    }
+
+
+def clear_item_price_cache(doc, method=None):
+    # a price moved to another price list leaves the old snapshot stale
+    previous = doc.get_doc_before_save()
+    clear_cache_after_commit(
+        ITEM_PRICE_CACHE_KEY, [doc.price_list, previous.price_list if previous else None]
+    )
+
+
 @frappe.whitelist()
 @ess_validate(methods=["POST"])
 def prepare_order_totals(*args, **kwargs):
@@ -0,0 +1,232 @@
+import os
+import hashlib
+import shutil
+import tempfile
+import time
+import frappe
+from employee_self_service.mobile.v1.api_utils import get_ess_settings
+
+# rendered slips live outside private/files so they are never served directly
+PDF_CACHE_FOLDER = "ess_salary_slips"
+PRERENDER_BATCH_SIZE = 50
+PRERENDER_MAX_WORKERS = 4
+PRERENDER_TIMEOUT = 3600
+
+
+def get_print_format(doctype="Salary Slip"):
+    return (
+        get_ess_settings().get("default_print_format")
+        or frappe.db.get_value(
+            "Property Setter",
+            dict(property="default_print_format", doc_type=doctype),
+            "value",
+        )
+        or "Standard"
+    )
+
+
+def get_salary_slip_pdf(doc, print_format=None):
+    """
+    PDF of the salary slip `doc`, rendered once per (name, modified, print
+    format, language) and read from the local cache afterwards.
+    """
+    print_format = print_format or get_print_format(doc.doctype)
+    path = get_pdf_cache_path(doc.name, doc.modified, print_format)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read()
+    pdf = render_salary_slip_pdf(doc, print_format)
+    write_pdf_cache(path, pdf)
+    return pdf
+
+
+def render_salary_slip_pdf(doc, print_format):
+    from frappe.utils.pdf import get_pdf
+
+    html = frappe.get_print(doc.doctype, doc.name, print_format, doc=doc)
+    return get_pdf(html)
+
+
+def get_pdf_cache_folder(name):
+    return frappe.get_site_path("private", PDF_CACHE_FOLDER, sha1(name))
+
+
+def get_pdf_cache_path(name, modified, print_format):
+    # renders of one version of the slip share the prefix of the file name
+    variant = f"{print_format}|{frappe.local.lang}"
+    return os.path.join(
+        get_pdf_cache_folder(name),
+        f"{sha1(str(modified))}-{sha1(variant)}.pdf",
+    )
+
+
+def sha1(value):
+    return hashlib.sha1(value.encode()).hexdigest()
+
+
+def write_pdf_cache(path, pdf):
+    folder, filename = os.path.split(path)
+    os.makedirs(folder, exist_ok=True)
+    # renders of an older version of the slip are stale, the other print
+    # formats and languages of this version are kept
+    version = filename.split("-", 1)[0]
+    for entry in os.listdir(folder):
+        if entry.endswith(".pdf") and not entry.startswith(f"{version}-"):
+            try:
+                os.remove(os.path.join(folder, entry))
+            except FileNotFoundError:
+                pass
+    # write then rename so concurrent downloads never read a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(pdf)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+
+def is_pdf_cached(name, modified, print_format):
+    return os.path.exists(get_pdf_cache_path(name, modified, print_format))
+
+
+def prerender_salary_slip(doc, method=None):
+    if not doc.payroll_entry:
+        frappe.enqueue(
+            "employee_self_service.mobile.v1.salary_slip_utils.render_salary_slips",
+            queue="long",
+            names=[doc.name],
+            enqueue_after_commit=True,
+        )
+        return
+
+    # a payroll entry submits all its slips at once, render them in one job
+    job_name = f"ess_prerender_salary_slips::{doc.payroll_entry}"
+    queued = frappe.flags.ess_prerender_jobs or set()
+    if job_name in queued or is_job_queued(job_name):
+        return
+    queued.add(job_name)
+    frappe.flags.ess_prerender_jobs = queued
+    frappe.enqueue(
+        "employee_self_service.mobile.v1.salary_slip_utils.prerender_payroll_entry",
+        queue="long",
+        timeout=PRERENDER_TIMEOUT,
+        job_name=job_name,
+        payroll_entry=doc.payroll_entry,
+        enqueue_after_commit=True,
+    )
+
+
+def is_job_queued(job_name, queue="long"):
+    from frappe.utils.background_jobs import get_jobs
+
+    site = frappe.local.site
+    return job_name in get_jobs(site=site, queue=queue, key="job_name").get(site, [])
+
+
+def prerender_payroll_entry(payroll_entry):
+    """
+    Render the submitted slips of `payroll_entry` that are not cached yet
+    in batches of PRERENDER_BATCH_SIZE over a pool of PRERENDER_MAX_WORKERS
+    processes, logging throughput and failures per batch.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    print_format = get_print_format()
+    names = [
+        slip.name
+        for slip in frappe.get_all(
+            "Salary Slip",
+            filters={"payroll_entry": payroll_entry, "docstatus": 1},
+            fields=["name", "modified"],
+            order_by="name asc",
+        )
+        if not is_pdf_cached(slip.name, slip.modified, print_format)
+    ]
+    if not names:
+        return
+
+    logger = frappe.logger("employee_self_service")
+    batches = [
+        names[i : i + PRERENDER_BATCH_SIZE]
+        for i in range(0, len(names), PRERENDER_BATCH_SIZE)
+    ]
+    summary = frappe._dict(total=len(names), rendered=0, failed=[])
+    start = time.monotonic()
+    # spawn, a forked worker would share the parent's database connection
+    with ProcessPoolExecutor(
+        max_workers=min(PRERENDER_MAX_WORKERS, len(batches)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_prerender_worker,
+        initargs=(frappe.local.site, frappe.local.sites_path, frappe.local.lang),
+    ) as pool:
+        futures = {
+            pool.submit(render_salary_slip_batch, batch, print_format): idx
+            for idx, batch in enumerate(batches)
+        }
+        for future in as_completed(futures):
+            idx = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = frappe._dict(
+                    rendered=0, failed=batches[idx], seconds=0, error=str(e)
+                )
+            summary.rendered += result["rendered"]
+            summary.failed.extend(result["failed"])
+            logger.info(
+                f"{payroll_entry} salary slip batch {idx + 1}/{len(batches)}: "
+                f"{result['rendered']} rendered, {len(result['failed'])} failed "
+                f"in {result['seconds']:.1f}s "
+                f"({result['rendered'] / (result['seconds'] or 1):.2f} slips/s)"
+            )
+            if result["failed"]:
+                frappe.log_error(
+                    title=f"ESS Salary Slip PDF Error: {payroll_entry}",
+                    message=f"batch {idx + 1}: {result.get('error') or ''}\n"
+                    + "\n".join(result["failed"]),
+                )
+    summary.seconds = time.monotonic() - start
+    logger.info(
+        f"{payroll_entry} salary slips: {summary.rendered}/{summary.total} rendered "
+        f"in {summary.seconds:.1f}s"
+    )
+    return summary
+
+
+def init_prerender_worker(site, sites_path, lang):
+    frappe.init(site=site, sites_path=sites_path)
+    frappe.connect()
+    frappe.set_user("Administrator")
+    frappe.local.lang = lang
+
+
+def render_salary_slip_batch(names, print_format):
+    # runs in a pool process, see init_prerender_worker
+    start = time.monotonic()
+    failed = render_salary_slips(names, print_format)
+    # keep the Error Logs of the failed slips
+    frappe.db.commit()
+    return dict(
+        rendered=len(names) - len(failed),
+        failed=failed,
+        seconds=time.monotonic() - start,
+    )
+
+
+def render_salary_slips(names, print_format=None):
+    print_format = print_format or get_print_format()
+    failed = []
+    for name in names:
+        try:
+            get_salary_slip_pdf(frappe.get_doc("Salary Slip", name), print_format)
+        except Exception:
+            failed.append(name)
+            frappe.log_error(title=f"ESS Salary Slip PDF Error: {name}")
+    return failed
+
+
+def clear_salary_slip_pdf_cache(doc, method=None):
+    shutil.rmtree(get_pdf_cache_folder(doc.name), ignore_errors=True)
@@ -0,0 +1,185 @@
+import json
+import frappe
+from frappe import _
+from employee_self_service.mobile.v1.api_utils import (
+    gen_response,
+    ess_validate,
+    get_employee_by_user,
+    exception_handler,
+    validate_employee_data,
+)
+
+"""delta sync api for the offline store of the mobile app"""
+
+SYNC_PAGE_LENGTH = 500
+
+# doctypes the app keeps locally, rows of doctypes with an `employee_field`
+# are limited to the session employee, the others go through frappe.get_list
+SYNC_DOCTYPES = {
+    "Expense Claim": dict(
+        employee_field="employee",
+        fields=[
+            "name",
+            "posting_date",
+            "total_claimed_amount",
+            "total_sanctioned_amount",
+            "approval_status",
+            "status",
+            "docstatus",
+        ],
+    ),
+    "Salary Slip": dict(
+        employee_field="employee",
+        fields=[
+            "name",
+            "posting_date",
+            "start_date",
+            "end_date",
+            "gross_pay",
+            "net_pay",
+            "currency",
+            "status",
+            "docstatus",
+        ],
+    ),
+    "Leave Application": dict(
+        employee_field="employee",
+        fields=[
+            "name",
+            "leave_type",
+            "from_date",
+            "to_date",
+            "total_leave_days",
+            "description",
+            "status",
+            "docstatus",
+        ],
+    ),
+    "ESS Documents": dict(
+        employee_field="employee_no",
+        fields=["name", "title", "attachement"],
+    ),
+    "Visit": dict(
+        fields=["name", "customer", "customer_name", "date", "time", "visit_type"],
+    ),
+    "Sales Order": dict(
+        fields=[
+            "name",
+            "customer_name",
+            "transaction_date",
+            "grand_total",
+            "status",
+            "total_qty",
+            "docstatus",
+        ],
+    ),
+}
+
+
+@frappe.whitelist()
+@ess_validate(methods=["GET", "POST"])
+def sync(since=None, doctypes=None):
+    """
+    Changes since the given watermarks for the doctypes of the app.
+
+    `since` maps doctype to the `watermark` returned for it by the previous
+    call, a doctype without one gets all its rows. Each doctype returns at
+    most SYNC_PAGE_LENGTH `changed` rows, the names `deleted` since the
+    watermark and `has_more` when it has to be called again.
+    """
+    try:
+        emp_data = get_employee_by_user(frappe.session.user)
+        if not len(emp_data) >= 1:
+            return gen_response(500, "Employee does not exists")
+        validate_employee_data(emp_data)
+        since = frappe.parse_json(since) or {}
+        doctypes = frappe.parse_json(doctypes) or list(SYNC_DOCTYPES)
+
+        sync_data = {}
+        for doctype in doctypes:
+            if doctype not in SYNC_DOCTYPES:
+                return gen_response(500, _("{0} can not be synced").format(doctype))
+            sync_data[doctype] = get_doctype_changes(
+                doctype, emp_data.get("name"), since.get(doctype)
+            )
+        return gen_response(200, "Sync data get successfully", sync_data)
+    except frappe.PermissionError:
+        return gen_response(500, "Not permitted to sync")
+    except Exception as e:
+        return exception_handler(e)
+
+
+def get_doctype_changes(doctype, employee, since=None):
+    changed = get_changed_rows(doctype, employee, since, limit=SYNC_PAGE_LENGTH + 1)
+    has_more = len(changed) > SYNC_PAGE_LENGTH
+    if has_more:
+        changed = changed[:SYNC_PAGE_LENGTH]
+        # never cut a page inside one `modified` value, the next call starts
+        # strictly after the watermark and would skip the rest of it
+        last_modified = changed[-1].modified
+        complete = [row for row in changed if row.modified != last_modified]
+        if complete:
+            changed = complete
+        else:
+            changed = get_changed_rows(doctype, employee, modified=last_modified)
+
+    watermark = str(changed[-1].modified) if changed else since
+    deleted = []
+    if since:
+        # on a partial page only tombstones up to the watermark are final
+        for row in get_deleted_rows(
+            doctype, employee, since, until=watermark if has_more else None
+        ):
+            deleted.append(row.name)
+            if not has_more and str(row.creation) > str(watermark):
+                watermark = str(row.creation)
+
+    return dict(watermark=watermark, changed=changed, deleted=deleted, has_more=has_more)
+
+
+def get_changed_rows(doctype, employee, since=None, limit=None, modified=None):
+    sync_doctype = SYNC_DOCTYPES[doctype]
+    filters = {}
+    if sync_doctype.get("employee_field"):
+        filters[sync_doctype["employee_field"]] = employee
+    if modified:
+        filters["modified"] = modified
+    elif since:
+        filters["modified"] = [">", since]
+    get_rows = frappe.get_all if sync_doctype.get("employee_field") else frappe.get_list
+    return get_rows(
+        doctype,
+        filters=filters,
+        fields=sync_doctype["fields"] + ["modified"],
+        order_by="modified asc",
+        limit=limit,
+    )
+
+
+def get_deleted_rows(doctype, employee, since, until=None):
+    filters = [
+        ["deleted_doctype", "=", doctype],
+        ["creation", ">", since],
+    ]
+    if until:
+        filters.append(["creation", "<=", until])
+    deleted_rows = frappe.get_all(
+        "Deleted Document",
+        filters=filters,
+        fields=["deleted_name as name", "data", "creation"],
+        order_by="creation asc",
+    )
+    # the deleted row is gone, so get_list can not scope the tombstones:
+    # apply the rule of get_changed_rows to the data kept for each of them
+    employee_field = SYNC_DOCTYPES[doctype].get("employee_field")
+    return [
+        row
+        for row in deleted_rows
+        if is_visible_tombstone(doctype, json.loads(row.data), employee_field, employee)
+    ]
+
+
+def is_visible_tombstone(doctype, data, employee_field, employee):
+    if employee_field:
+        return data.get(employee_field) == employee
+    return frappe.has_permission(doctype, "read", doc=frappe.get_doc(data))
@@ -0,0 +1,147 @@
+import json
+import frappe
+from frappe.utils import pretty_date, cint
+
+
+def enrich_tasks(tasks):
+    """
+    Resolve project names, assigned by/to users and comment counts for a
+    page of tasks with one bulk query each, whatever the page length. The
+    comments themselves are loaded on demand with `get_task_comments`.
+    """
+    if not tasks:
+        return tasks
+
+    for task in tasks:
+        task["assigned_to"] = (
+            json.loads(task.get("assigned_to")) if task.get("assigned_to") else []
+        )
+
+    projects = get_project_map([task.get("project") for task in tasks])
+    comment_counts = get_comment_count_map([task.get("name") for task in tasks])
+
+    users = set()
+    for task in tasks:
+        users.add(task.get("assigned_by"))
+        users.update(task.get("assigned_to"))
+    users = get_user_map(users)
+
+    for task in tasks:
+        if task.get("exp_end_date"):
+            task["exp_end_date"] = task["exp_end_date"].strftime("%d-%m-%Y")
+        task["project_name"] = projects.get(task.get("project"))
+        task["assigned_by"] = get_user_details(users.get(task.get("assigned_by")))
+        task["assigned_to"] = [
+            get_user_details(users.get(user))
+            for user in sorted(
+                (user for user in task.get("assigned_to") if user in users),
+                key=lambda user: users[user].creation,
+            )
+        ]
+        task["num_comments"] = comment_counts.get(task.get("name"), 0)
+    return tasks
+
+
+def get_assigned_tasks(user, fields, conditions=None, values=None, limit=None):
+    """
+    Tasks with an open ToDo allocated to `user`. Goes through the
+    (allocated_to, reference_type, status) index on ToDo rather than a
+    LIKE on Task._assign, which also matched users whose email contains
+    the given one.
+    """
+    values = dict(values or {}, user=user)
+    conditions = "".join(f" AND {condition}" for condition in conditions or [])
+    limit = f"LIMIT {cint(limit)}" if limit else ""
+    return frappe.db.sql(
+        f"""SELECT {", ".join(f"task.{field}" for field in fields)}
+        FROM `tabToDo` todo
+        INNER JOIN `tabTask` task ON task.name = todo.reference_name
+        WHERE todo.allocated_to = %(user)s
+        AND todo.reference_type = 'Task'
+        AND todo.status = 'Open'
+        {conditions}
+        ORDER BY task.modified DESC
+        {limit}""",
+        values,
+        as_dict=1,
+    )
+
+
+def get_project_map(projects):
+    projects = list(set(filter(None, projects)))
+    if not projects:
+        return {}
+    return dict(
+        frappe.get_all(
+            "Project",
+            filters={"name": ["in", projects]},
+            fields=["name", "project_name"],
+            as_list=1,
+        )
+    )
+
+
+def get_user_map(users):
+    users = list(set(filter(None, users)))
+    if not users:
+        return {}
+    user_list = frappe.get_all(
+        "User",
+        filters={"name": ["in", users]},
+        fields=["name", "full_name", "user_image", "creation"],
+    )
+    return {user.name: user for user in user_list}
+
+
+def get_user_details(user):
+    if not user:
+        return None
+    return frappe._dict(user=user.full_name, user_image=user.user_image)
+
+
+def get_comment_count_map(tasks):
+    if not tasks:
+        return {}
+    return dict(
+        frappe.get_all(
+            "Comment",
+            filters={
+                "reference_doctype": "Task",
+                "reference_name": ["in", tasks],
+                "comment_type": "Comment",
+            },
+            fields=["reference_name", "count(name) as num_comments"],
+            group_by="reference_name",
+            as_list=1,
+        )
+    )
+
+
+def get_task_comments(task, start=0, page_length=20):
+    # exact match on (reference_doctype, reference_name), see constants.indexes
+    comments = frappe.get_all(
+        "Comment",
+        filters={
+            "reference_doctype": "Task",
+            "reference_name": task,
+            "comment_type": "Comment",
+        },
+        fields=[
+            "content as comment",
+            "comment_by",
+            "reference_name",
+            "creation",
+            "comment_email",
+        ],
+        start=start,
+        page_length=page_length,
+        order_by="creation desc",
+    )
+    users = get_user_map(comment.comment_email for comment in comments)
+    for comment in comments:
+        comment["commented"] = pretty_date(comment["creation"])
+        comment["creation"] = comment["creation"].strftime("%I:%M %p")
+        comment["user_image"] = (users.get(comment.comment_email) or {}).get(
+            "user_image"
+        )
+    return comments
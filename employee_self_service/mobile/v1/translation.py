@@ -1,12 +1,20 @@
+import base64
+import gzip
+import hashlib
+import json
 import frappe
 from frappe import _
+from frappe.utils import cint
 from employee_self_service.mobile.v1.api_utils import (
     gen_response,
     ess_validate,
     get_ess_settings,
     exception_handler,
+    clear_cache_after_commit,
 )
 
+TRANSLATION_CACHE_KEY = "ess_translation_bundle"
+
 
 @frappe.whitelist()
 @ess_validate(methods=["GET"])
@@ -29,35 +37,88 @@ def get_ess_language():
 
 @frappe.whitelist()
 @ess_validate(methods=["GET"])
-def get_translation(language):
+def get_translation(language, etag=None, compress=0):
+    """
+    Translation bundle of `language`. The bundle is served from redis and
+    carries an etag; when the client sends it back, through the
+    If-None-Match header or the etag argument, a 304 without data is
+    returned. With compress=1 the translations are sent gzipped and base64
+    encoded.
+    """
     try:
         if not language:
             return gen_response(500, "Language is required.")
 
-        ess_language_data = frappe.get_value(
-            "ESS Language",
-            {"language": language},
-            ["language"],
-            as_dict=1,
-        )
-        if not ess_language_data:
+        bundle = get_translation_bundle(language)
+        if not bundle:
             return gen_response(500, "Invalid Language.")
-        translation_doc = frappe.get_all(
-            "Ess Translation",
-            filters={"language": language},
-            fields=["source_text", "translated_text"],
-        )
-        translation_data = {}
-        for translation in translation_doc:
-            translation_data[translation.get("source_text")] = translation.get(
-                "translated_text"
-            ) or translation.get("source_text")
-        return gen_response(
-            200,
-            "Translation retrieved successfully",
-            {
-                "translation_data": translation_data,
-            },
-        )
+
+        set_etag_header(bundle["etag"])
+        if_none_match = etag or frappe.get_request_header("If-None-Match")
+        if if_none_match and if_none_match == bundle["etag"]:
+            return gen_response(
+                304, "Translation not modified", {"etag": bundle["etag"]}
+            )
+
+        if cint(compress):
+            data = {
+                "etag": bundle["etag"],
+                "encoding": "gzip",
+                "translation_data": bundle["compressed_data"],
+            }
+        else:
+            data = {
+                "etag": bundle["etag"],
+                "translation_data": bundle["translation_data"],
+            }
+        return gen_response(200, "Translation retrieved successfully", data)
     except Exception as e:
         return exception_handler(e)
+
+
+def get_translation_bundle(language):
+    bundle = frappe.cache().hget(TRANSLATION_CACHE_KEY, language)
+    if bundle:
+        return bundle
+
+    if not frappe.db.exists("ESS Language", {"language": language}):
+        return
+    translation_doc = frappe.get_all(
+        "Ess Translation",
+        filters={"language": language},
+        fields=["source_text", "translated_text"],
+    )
+    translation_data = {}
+    for translation in translation_doc:
+        translation_data[translation.get("source_text")] = translation.get(
+            "translated_text"
+        ) or translation.get("source_text")
+
+    content = json.dumps(translation_data, sort_keys=True, separators=(",", ":"))
+    content_hash = hashlib.sha1(content.encode()).hexdigest()
+    bundle = {
+        "etag": f'"{language}-{content_hash}"',
+        "translation_data": translation_data,
+        "compressed_data": base64.b64encode(gzip.compress(content.encode())).decode(),
+    }
+    frappe.cache().hset(TRANSLATION_CACHE_KEY, language, bundle)
+    return bundle
+
+
+def set_etag_header(etag):
+    # response headers can only be set on frappe versions exposing them
+    response_headers = getattr(frappe.local, "response_headers", None)
+    if response_headers is not None:
+        response_headers["ETag"] = etag
+
+
+def clear_translation_cache(doc, method=None):
+    if doc.doctype == "Employee Self Service Settings":
+        # the enabled languages live in the settings
+        clear_cache_after_commit(TRANSLATION_CACHE_KEY)
+    else:
+        # a translation moved to another language leaves the old one stale
+        previous = doc.get_doc_before_save()
+        clear_cache_after_commit(
+            TRANSLATION_CACHE_KEY, [doc.language, previous.language if previous else None]
+        )
@@ -0,0 +1,37 @@
+import json
+import frappe
+from employee_self_service.employee_self_service.doctype.ess_post_like.ess_post_like import (
+    get_like_name,
+)
+from frappe.utils import now
+
+
+def execute():
+    # likes used to live in the _liked_by json of the post
+    timestamp = now()
+    for post in frappe.get_all("ESS Post", fields=["name", "_liked_by"]):
+        likes = [
+            (get_like_name(post.name, user), timestamp, timestamp, user, user, post.name, user)
+            for user in set(json.loads(post._liked_by or "[]"))
+        ]
+        if likes:
+            frappe.db.bulk_insert(
+                "ESS Post Like",
+                ["name", "creation", "modified", "modified_by", "owner", "post", "user"],
+                likes,
+                ignore_duplicates=True,
+            )
+
+    frappe.db.sql(
+        """UPDATE `tabESS Post` post
+        SET like_count = (
+            SELECT COUNT(*) FROM `tabESS Post Like` post_like
+            WHERE post_like.post = post.name
+        ),
+        comment_count = (
+            SELECT COUNT(*) FROM `tabComment` comment
+            WHERE comment.reference_doctype = 'ESS Post'
+            AND comment.reference_name = post.name
+            AND comment.comment_type = 'Comment'
+        )"""
+    )
@@ -0,0 +1,22 @@
+import frappe
+
+
+def execute():
+    # keep the latest vote per (post, user) before the unique key is added
+    frappe.db.sql(
+        """DELETE poll_log FROM `tabESS Post Poll Log` poll_log
+        INNER JOIN `tabESS Post Poll Log` newer
+            ON newer.parent = poll_log.parent
+            AND newer.user = poll_log.user
+            AND (newer.modified > poll_log.modified
+                OR (newer.modified = poll_log.modified AND newer.name > poll_log.name))"""
+    )
+    frappe.db.sql(
+        """UPDATE `tabESS Post Poll Options` poll_option
+        SET num_of_vote = (
+            SELECT COUNT(*) FROM `tabESS Post Poll Log` poll_log
+            WHERE poll_log.parent = poll_option.parent
+            AND poll_log.answer = poll_option.`option`
+        )
+        WHERE poll_option.parenttype = 'ESS Post'"""
+    )
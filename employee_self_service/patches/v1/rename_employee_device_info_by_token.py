@@ -0,0 +1,22 @@
+import frappe
+from employee_self_service.employee_self_service.doctype.employee_device_info.employee_device_info import (
+    get_device_name,
+)
+
+
+def execute():
+    # devices used to be named after the user, they are now keyed by token
+    for device in frappe.get_all("Employee Device Info", fields=["name", "token"]):
+        if not device.token:
+            frappe.db.delete("Employee Device Info", {"name": device.name})
+            continue
+        device_name = get_device_name(device.token)
+        if device_name == device.name:
+            continue
+        if frappe.db.exists("Employee Device Info", device_name):
+            frappe.db.delete("Employee Device Info", {"name": device.name})
+        else:
+            frappe.db.sql(
+                "UPDATE `tabEmployee Device Info` SET name=%s WHERE name=%s",
+                (device_name, device.name),
+            )
@@ -3,11 +3,13 @@ from frappe.custom.doctype.custom_field.custom_field import (
     create_custom_fields as _create_custom_fields,
 )
 from employee_self_service.constants.custom_fields import CUSTOM_FIELDS
+from employee_self_service.constants.indexes import INDEXES, UNIQUE_INDEXES
 
 
 def after_install():
     create_custom_fields()
     add_default_language_in_ess_settings()
+    create_indexes()
 
 def create_custom_fields():
     print("Creating custom fields")
@@ -15,6 +17,15 @@ def create_custom_fields():
     print("Custom fields added")
 
 
+def create_indexes():
+    for doctype, indexes in INDEXES.items():
+        for fields in indexes:
+            frappe.db.add_index(doctype, fields)
+    for doctype, indexes in UNIQUE_INDEXES.items():
+        for fields in indexes:
+            frappe.db.add_unique(doctype, fields)
+
+
 def get_all_custom_fields():
     result = {}
 